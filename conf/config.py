@@ -6,6 +6,8 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     # Base app
     LOG_LEVEL: str
+    log_format: str = Field("console", env="LOG_FORMAT")  # console | json
+    slow_update_threshold: float = Field(1.0, env="SLOW_UPDATE_THRESHOLD")
     BOT_TOKEN: str
     WEBHOOK_URL: str | None
 
@@ -16,6 +18,60 @@ class Settings(BaseSettings):
     retry_jitter: float = Field(0.25, env="RETRY_JITTER")
     retry_status_codes: str = Field("429,500,502,503,504", env="RETRY_STATUS_CODES")
 
+    # Outbound Bot API: connection pool and rate limits
+    tg_pool_size: int = Field(100, env="TG_POOL_SIZE")
+    tg_keepalive_timeout: float = Field(60.0, env="TG_KEEPALIVE_TIMEOUT")
+    tg_global_rate: float = Field(30.0, env="TG_GLOBAL_RATE")
+    tg_private_chat_rate: float = Field(1.0, env="TG_PRIVATE_CHAT_RATE")
+    tg_group_chat_per_minute: float = Field(20.0, env="TG_GROUP_CHAT_PER_MINUTE")
+    tg_chat_burst: float = Field(3.0, env="TG_CHAT_BURST")
+
+    # Webhook update queue
+    webhook_queue_size: int = Field(1000, env="WEBHOOK_QUEUE_SIZE")
+    webhook_workers: int = Field(16, env="WEBHOOK_WORKERS")
+    webhook_overload_policy: str = Field("reject", env="WEBHOOK_OVERLOAD_POLICY")
+    webhook_max_connections: int | None = Field(None, env="WEBHOOK_MAX_CONNECTIONS")
+    webhook_drop_pending_updates: bool = Field(False, env="WEBHOOK_DROP_PENDING_UPDATES")
+
+    # Polling mode
+    polling_limit: int = Field(100, env="POLLING_LIMIT")
+    polling_timeout: int = Field(30, env="POLLING_TIMEOUT")
+    polling_concurrency: int = Field(16, env="POLLING_CONCURRENCY")
+    polling_offset_path: str = Field("data/polling_offset.json", env="POLLING_OFFSET_PATH")
+
+    # Webhook update_id deduplication
+    dedup_capacity: int = Field(10000, env="DEDUP_CAPACITY")
+    dedup_shared: bool = Field(False, env="DEDUP_SHARED")
+    dedup_ttl: int = Field(3600, env="DEDUP_TTL")
+
+    # Media
+    media_cache_path: str = Field("data/media_cache.json", env="MEDIA_CACHE_PATH")
+
+    # Catalog (managers, marketplaces)
+    catalog_path: str | None = Field(None, env="CATALOG_PATH")
+    catalog_ttl: float = Field(300.0, env="CATALOG_TTL")
+    catalog_watch_interval: float = Field(5.0, env="CATALOG_WATCH_INTERVAL")
+
+    # FSM storage: memory | redis | sqlite
+    fsm_storage: str = Field("memory", env="FSM_STORAGE")
+    redis_url: str = Field("redis://localhost:6379/0", env="REDIS_URL")
+    fsm_sqlite_path: str = Field("data/fsm.sqlite3", env="FSM_SQLITE_PATH")
+    fsm_pool_size: int = Field(10, env="FSM_POOL_SIZE")
+    fsm_state_ttl: int | None = Field(7 * 24 * 60 * 60, env="FSM_STATE_TTL")
+    fsm_flush_interval: float = Field(0.5, env="FSM_FLUSH_INTERVAL")
+
+    # Bot and chat info cache for the permissions API
+    chat_info_ttl: float = Field(300.0, env="CHAT_INFO_TTL")
+    bot_info_ttl: float = Field(3600.0, env="BOT_INFO_TTL")
+    permissions_bulk_concurrency: int = Field(10, env="PERMISSIONS_BULK_CONCURRENCY")
+    permissions_bulk_rate: float = Field(5.0, env="PERMISSIONS_BULK_RATE")
+    # Bulk permissions endpoint is disabled unless a token is set
+    permissions_api_token: Optional[str] = Field(None, env="PERMISSIONS_API_TOKEN")
+    chat_registry_path: str = Field("data/chat_registry.json", env="CHAT_REGISTRY_PATH")
+
+    # Graceful shutdown
+    shutdown_drain_timeout: float = Field(10.0, env="SHUTDOWN_DRAIN_TIMEOUT")
+
     @property
     def retry_status_codes_set(self) -> set[int]:
         """Парсит строку статус кодов в множество интов."""
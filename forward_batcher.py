@@ -0,0 +1,106 @@
+"""Группировка сообщений для пересылки пачками с сохранением альбомов."""
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+from telethon.tl.custom import Message
+
+logger = logging.getLogger(__name__)
+
+# Telegram пересылает не больше 100 сообщений за один вызов forward_messages
+MAX_BATCH_SIZE = 100
+
+
+class ForwardBatcher:
+    """
+    Собирает новые сообщения в пачки и передает их на пересылку по одной.
+
+    Пачка закрывается, когда набрано max_size сообщений или через window секунд
+    после первого сообщения. Части альбома (общий grouped_id) всегда попадают в одну
+    пачку: пока приходят части альбома, закрытие откладывается еще на window.
+    Пачки пересылаются строго по очереди фоновым обработчиком, поэтому добавление
+    сообщения не ждет пересылки.
+    """
+
+    def __init__(
+        self,
+        send_batch: Callable[[List[Message]], Awaitable[None]],
+        window: float = 0.5,
+        max_size: int = MAX_BATCH_SIZE,
+    ):
+        self._send_batch = send_batch
+        self._window = window
+        self._max_size = max(1, min(max_size, MAX_BATCH_SIZE))
+        self._batch: List[Message] = []
+        self._deadline = 0.0
+        self._timer: Optional[asyncio.Task] = None
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Запускает фоновую пересылку пачек."""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    def add(self, message: Message):
+        """Добавляет сообщение в текущую пачку."""
+        loop = asyncio.get_running_loop()
+
+        if len(self._batch) >= self._max_size:
+            # Альбом не разрываем: его начало переносится в следующую пачку
+            carry = []
+            if message.grouped_id is not None:
+                while self._batch and self._batch[-1].grouped_id == message.grouped_id:
+                    carry.insert(0, self._batch.pop())
+            self._close_batch()
+            self._batch.extend(carry)
+
+        if not self._batch:
+            self._deadline = loop.time() + self._window
+        elif message.grouped_id is not None:
+            # Ждем остальные части альбома
+            self._deadline = max(self._deadline, loop.time() + self._window)
+        self._batch.append(message)
+
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._close_on_deadline())
+
+    async def stop(self):
+        """Пересылает накопленные сообщения и останавливает обработчик."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._close_batch()
+
+        if self._worker is not None:
+            await self._ready.join()
+            self._worker.cancel()
+            self._worker = None
+
+    def _close_batch(self):
+        if self._batch:
+            self._ready.put_nowait(self._batch)
+            self._batch = []
+
+    async def _close_on_deadline(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self._batch:
+                delay = self._deadline - loop.time()
+                if delay <= 0:
+                    self._close_batch()
+                    break
+                await asyncio.sleep(delay)
+        finally:
+            if self._timer is asyncio.current_task():
+                self._timer = None
+
+    async def _run(self):
+        while True:
+            batch = await self._ready.get()
+            try:
+                await self._send_batch(batch)
+            except Exception as e:
+                logger.error("Ошибка при пересылке пачки из %s сообщений: %s", len(batch), e, exc_info=True)
+            finally:
+                self._ready.task_done()
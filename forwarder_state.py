@@ -0,0 +1,154 @@
+"""Состояние пересыльщика с отложенной атомарной записью на диск."""
+import os
+import json
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ForwarderState:
+    """
+    Индекс следующего целевого чата, ID последнего пересланного сообщения и пропуски.
+
+    Пропуск - сообщения с ID больше gap_from и меньше gap_to, которые не удалось
+    догнать. Отметка последнего пересланного сообщения при этом двигается дальше,
+    а пропуск догоняется отдельно и закрывается по мере пересылки его сообщений.
+
+    Изменения копятся в памяти и записываются на диск не чаще, чем раз в
+    flush_interval секунд, или сразу после flush_every изменений. Запись
+    выполняется в отдельном потоке: во временный файл с fsync и затем
+    os.replace, поэтому при падении на диске остается старое или новое
+    состояние целиком. close() записывает несохраненные изменения.
+    """
+
+    def __init__(self, path: str, flush_every: int = 20, flush_interval: float = 1.0):
+        self._path = path
+        self._flush_every = max(1, flush_every)
+        self._flush_interval = flush_interval
+        self._data: Dict[str, Any] = self._load()
+        self._changes = 0
+        self._timer: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def target_chat_index(self) -> int:
+        return self._data.get('target_chat_index', 0)
+
+    @property
+    def last_forwarded_message_id(self) -> int:
+        return self._data.get('last_forwarded_message_id', 0)
+
+    @property
+    def gaps(self) -> List[Tuple[int, Optional[int]]]:
+        """Недогнанные пропуски (gap_from, gap_to); gap_to None - пропуск еще не закрыт новой пересылкой."""
+        return [(gap_from, gap_to) for gap_from, gap_to in self._data.get('gaps', [])]
+
+    def update(self, target_chat_index: int, message_ids: List[int]):
+        """Запоминает новый индекс чата и пересланную пачку; запись на диск откладывается."""
+        self._data['target_chat_index'] = target_chat_index
+        # Пачки из разных источников (догонялка, новые сообщения) могут прийти не по порядку
+        self._data['last_forwarded_message_id'] = max(self.last_forwarded_message_id, *message_ids)
+        if self.gaps:
+            self._set_gaps([self._advance_gap(gap, message_ids) for gap in self.gaps])
+        self._changed()
+
+    def add_gap(self, gap_from: int):
+        """Запоминает пропуск после gap_from; он закончится на первом пересланном после него сообщении."""
+        self._set_gaps(self.gaps + [(gap_from, None)])
+        self._changed()
+
+    def replace_gap(self, gap: Tuple[int, Optional[int]], new_gap: Optional[Tuple[int, int]]):
+        """Заменяет пропуск на new_gap (сужает до найденных сообщений) или удаляет его, если new_gap None."""
+        self._set_gaps([new_gap if existing == gap else existing for existing in self.gaps])
+        self._changed()
+
+    async def flush(self):
+        """Записывает накопленные изменения на диск."""
+        async with self._flush_lock:
+            if not self._changes:
+                return
+            data = dict(self._data)
+            self._changes = 0
+            try:
+                await asyncio.to_thread(self._write, data)
+            except Exception as e:
+                # Изменения остаются несохраненными до следующей записи
+                self._changes = max(self._changes, 1)
+                logger.warning("Не удалось сохранить состояние: %s", e)
+
+    def _changed(self):
+        self._changes += 1
+        if self._changes >= self._flush_every:
+            self._cancel_timer()
+            self._timer = asyncio.create_task(self._flush_later(0))
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later(self._flush_interval))
+
+    def _set_gaps(self, gaps: List[Optional[Tuple[int, Optional[int]]]]):
+        gaps = [list(gap) for gap in gaps if gap is not None]
+        if gaps:
+            self._data['gaps'] = gaps
+        else:
+            self._data.pop('gaps', None)
+
+    @staticmethod
+    def _advance_gap(gap: Tuple[int, Optional[int]], message_ids: List[int]) -> Optional[Tuple[int, Optional[int]]]:
+        """Закрывает открытый пропуск и сдвигает начало пропуска за его пересланные сообщения."""
+        gap_from, gap_to = gap
+        if gap_to is None:
+            later = [message_id for message_id in message_ids if message_id > gap_from]
+            if not later:
+                return gap
+            gap_to = min(later)
+        # Пропуск догоняется по порядку: его более ранние сообщения уже в очереди пересылки
+        gap_from = max([message_id for message_id in message_ids if gap_from < message_id < gap_to], default=gap_from)
+        return (gap_from, gap_to) if gap_to - gap_from > 1 else None
+
+    async def close(self):
+        """Отменяет отложенную запись и сохраняет текущее состояние."""
+        self._cancel_timer()
+        # Начатая запись не отменяется, flush() дождется ее под блокировкой
+        await self.flush()
+
+    async def _flush_later(self, delay: float):
+        try:
+            await asyncio.sleep(delay)
+            # Отмена таймера не должна прерывать запись, уже переданную в поток
+            await asyncio.shield(self.flush())
+        finally:
+            if self._timer is asyncio.current_task():
+                self._timer = None
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self._path, 'r') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning("Не удалось загрузить состояние: %s, начинаю с 0", e)
+            return {}
+        if not isinstance(state, dict):
+            return {}
+        # Открытый пропуск, после которого ничего не переслано, пуст: отметка осталась на его начале
+        gaps = [gap for gap in state.get('gaps', []) if gap[1] is not None]
+        if gaps:
+            state['gaps'] = gaps
+        else:
+            state.pop('gaps', None)
+        return state
+
+    def _write(self, data: Dict[str, Any]):
+        tmp_path = f"{self._path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path)
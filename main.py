@@ -1,24 +1,62 @@
 """Основной скрипт для прослушивания и пересылки сообщений из Telegram чата."""
-import asyncio
-import json
-import logging
 import os
 import sys
-from telethon import TelegramClient, events
-from telethon.sessions import StringSession
+import asyncio
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+
 from config import Config
+from telethon import TelegramClient, events, functions, utils
+from telethon.errors import FloodWaitError
+from telethon.sessions import StringSession
 
+from forward_batcher import ForwardBatcher
+from forwarder_state import ForwarderState
+from outbox import Outbox, PermanentForwardError
 
-# Настройка логирования
+
+class _AsyncQueueHandler(QueueHandler):
+    """Только ставит запись в очередь; форматирование (и traceback) выполняет поток QueueListener."""
+
+    def prepare(self, record):
+        # Стандартный prepare форматирует запись целиком; здесь подставляем только аргументы,
+        # которые могут измениться до записи
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+# Настройка логирования: обработчик только ставит запись в очередь,
+# форматирование и запись в stdout выполняет фоновый поток
+_log_queue = SimpleQueue()
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+log_listener = QueueListener(_log_queue, _stdout_handler)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.StreamHandler(sys.stdout)
+        _AsyncQueueHandler(_log_queue)
     ]
 )
 logger = logging.getLogger(__name__)
 
+# Окно группировки сообщений в одну пачку пересылки, секунд, и максимальный размер пачки
+FORWARD_BATCH_WINDOW = float(os.getenv('FORWARD_BATCH_WINDOW', '0.5'))
+FORWARD_BATCH_SIZE = int(os.getenv('FORWARD_BATCH_SIZE', '100'))
+# Очередь пересылок на диске: число попыток и минимальный интервал между пересылками в один чат, секунд
+FORWARD_OUTBOX_PATH = os.getenv('FORWARD_OUTBOX_PATH', 'data/forwarder_outbox.sqlite3')
+FORWARD_MAX_ATTEMPTS = int(os.getenv('FORWARD_MAX_ATTEMPTS', '10'))
+FORWARD_TARGET_INTERVAL = float(os.getenv('FORWARD_TARGET_INTERVAL', '1.0'))
+# Состояние записывается на диск после стольких пересылок или через столько секунд после первой несохраненной
+FORWARD_STATE_FLUSH_EVERY = int(os.getenv('FORWARD_STATE_FLUSH_EVERY', '20'))
+FORWARD_STATE_FLUSH_INTERVAL = float(os.getenv('FORWARD_STATE_FLUSH_INTERVAL', '1.0'))
+# Сколько последних пропущенных за время простоя сообщений пересылать при старте (0 - не догонять)
+FORWARD_CATCHUP_LIMIT = int(os.getenv('FORWARD_CATCHUP_LIMIT', '500'))
+# Попыток получить пропущенные сообщения и максимальное ожидание между ними (в том числе FloodWait), секунд
+FORWARD_CATCHUP_ATTEMPTS = int(os.getenv('FORWARD_CATCHUP_ATTEMPTS', '3'))
+FORWARD_CATCHUP_MAX_WAIT = float(os.getenv('FORWARD_CATCHUP_MAX_WAIT', '60'))
+
 
 class MessageForwarder:
     """Класс для пересылки сообщений между чатами."""
@@ -27,13 +65,32 @@ class MessageForwarder:
         """Инициализирует forwarder с конфигурацией."""
         self.config = config
         self.client = None
+        self.source_peer = None  # Будет заполнено при старте
         # Используем директорию data для сохранения состояния
         os.makedirs('data', exist_ok=True)
-        self.state_file = 'data/forwarder_state.json'
+        self.state = ForwarderState(
+            'data/forwarder_state.json',
+            flush_every=FORWARD_STATE_FLUSH_EVERY,
+            flush_interval=FORWARD_STATE_FLUSH_INTERVAL,
+        )
         self.target_chat_ids = config.get_target_chat_ids()
-        self.target_chat_entities = []  # Будет заполнено при старте
+        self.target_chat_entities = {}  # ID целевого чата -> entity, заполняется при старте
+        self._catchup_buffer = None  # Новые сообщения, пришедшие во время догонялки
         # Загружаем сохраненное состояние или начинаем с 0
         self.target_chat_index = self._load_state()
+        # Новые сообщения пересылаются пачками: альбом - одним вызовом в один чат
+        self.batcher = ForwardBatcher(
+            self.forward_batch,
+            window=FORWARD_BATCH_WINDOW,
+            max_size=FORWARD_BATCH_SIZE,
+        )
+        # Пачки сохраняются на диск и пересылаются отдельным обработчиком с повторами
+        self.outbox = Outbox(
+            FORWARD_OUTBOX_PATH,
+            self.deliver,
+            max_attempts=FORWARD_MAX_ATTEMPTS,
+            target_interval=FORWARD_TARGET_INTERVAL,
+        )
     
     async def start(self):
         """Запускает клиент и начинает прослушивание."""
@@ -54,7 +111,7 @@ class MessageForwarder:
             raise RuntimeError("Аккаунт не авторизован. Проверьте TELEGRAM_SESSION_STRING")
         
         me = await self.client.get_me()
-        logger.info(f"Авторизован как: {me.first_name} (@{me.username})")
+        logger.info("Авторизован как: %s (@%s)", me.first_name, me.username)
         
         # Загрузка всех диалогов для заполнения кеша (критично для приватных чатов)
         logger.info("Загрузка диалогов для заполнения кеша...")
@@ -62,21 +119,19 @@ class MessageForwarder:
             await self.client.get_dialogs(limit=None)
             logger.info("Диалоги загружены, кеш заполнен")
         except Exception as e:
-            logger.warning(f"Не удалось загрузить все диалоги: {e}, продолжаю...")
+            logger.warning("Не удалось загрузить все диалоги: %s, продолжаю...", e)
         
-        # Попытка получить информацию об исходном чате для проверки доступа
+        # Исходный чат резолвится один раз при старте: дальше по его peer ID
+        # фильтрует сам Telethon, сообщения из остальных чатов до обработчика не доходят.
+        # Если получить чат не удалось, фильтруем по ID из конфигурации
+        source_chat_filter = self._parse_chat_id(self.config.source_chat_id)
         try:
-            # Пробуем преобразовать в int, если это число
-            try:
-                source_chat_id_int = int(self.config.source_chat_id)
-            except ValueError:
-                source_chat_id_int = self.config.source_chat_id
-            
-            source_chat = await self.client.get_entity(source_chat_id_int)
+            source_chat = await self.client.get_entity(source_chat_filter)
+            source_chat_filter = utils.get_peer_id(source_chat)
             chat_title = getattr(source_chat, 'title', getattr(source_chat, 'first_name', 'Unknown'))
-            logger.info(f"Исходный чат найден: {chat_title} (ID: {self.config.source_chat_id})")
+            logger.info("Исходный чат найден: %s (ID: %s)", chat_title, self.config.source_chat_id)
         except Exception as e:
-            logger.warning(f"Не удалось получить информацию об исходном чате {self.config.source_chat_id}: {e}")
+            logger.warning("Не удалось получить информацию об исходном чате %s: %s", self.config.source_chat_id, e)
             logger.warning("Продолжаю работу, но сообщения могут не обрабатываться")
             logger.warning("Убедитесь, что:")
             logger.warning("  1. ID чата указан правильно (для групп используйте отрицательный ID)")
@@ -84,129 +139,219 @@ class MessageForwarder:
         
         # Предзагрузка entity для всех целевых чатов (важно для приватных чатов)
         logger.info("Предзагрузка информации о целевых чатах...")
-        self.target_chat_entities = []
+        self.target_chat_entities = {}
         for i, target_chat_id in enumerate(self.target_chat_ids):
             try:
-                # Пробуем преобразовать в int, если это число
-                try:
-                    target_chat_id_int = int(target_chat_id)
-                except ValueError:
-                    target_chat_id_int = target_chat_id
-                
-                target_entity = await self.client.get_entity(target_chat_id_int)
-                self.target_chat_entities.append(target_entity)
-                
+                target_entity = await self._get_target_entity(target_chat_id)
                 chat_title = getattr(target_entity, 'title', getattr(target_entity, 'first_name', 'Unknown'))
-                logger.info(f"  Целевой чат {i+1}/{len(self.target_chat_ids)} загружен: {chat_title} (ID: {target_chat_id})")
+                logger.info("  Целевой чат %s/%s загружен: %s (ID: %s)", i + 1, len(self.target_chat_ids), chat_title, target_chat_id)
             except Exception as e:
-                logger.error(f"  Не удалось загрузить целевой чат {target_chat_id}: {e}")
-                # Сохраняем None для этого чата, чтобы не ломать индексацию
-                self.target_chat_entities.append(None)
+                # Загрузка повторится при пересылке в этот чат
+                logger.error("  Не удалось загрузить целевой чат %s: %s", target_chat_id, e)
         
         # Проверяем, что хотя бы один чат загружен успешно
-        loaded_count = sum(1 for e in self.target_chat_entities if e is not None)
+        loaded_count = len(self.target_chat_entities)
         if loaded_count == 0:
             logger.error("Не удалось загрузить ни один целевой чат! Проверьте доступ к чатам.")
             raise RuntimeError("Не удалось загрузить целевые чаты")
         elif loaded_count < len(self.target_chat_ids):
-            logger.warning(f"Загружено только {loaded_count} из {len(self.target_chat_ids)} целевых чатов")
+            logger.warning("Загружено только %s из %s целевых чатов", loaded_count, len(self.target_chat_ids))
         
-        # Регистрация обработчика всех новых сообщений
-        # Фильтрация по чату будет происходить в обработчике
-        @self.client.on(events.NewMessage())
+        # Регистрация обработчика новых сообщений исходного чата
+        @self.client.on(events.NewMessage(chats=source_chat_filter))
         async def handler(event):
             await self.handle_new_message(event)
         
-        logger.info(f"Начинаю прослушивание чата: {self.config.source_chat_id}")
-        logger.info(f"Целевые чаты для пересылки: {', '.join(self.target_chat_ids)}")
+        logger.info("Начинаю прослушивание чата: %s (peer ID: %s)", self.config.source_chat_id, source_chat_filter)
+        logger.info("Целевые чаты для пересылки: %s", ', '.join(self.target_chat_ids))
+        
+        self.source_peer = source_chat_filter
+        await self.outbox.open()
+        pending = await self.outbox.pending()
+        if pending:
+            logger.info("В очереди пересылки осталось %s пачек с прошлого запуска", pending)
+        self.outbox.start()
+        self.batcher.start()
+        
+        # Пропущенные за время простоя сообщения уходят в те же пачки перед новыми
+        await self.catch_up()
         
         # Запуск прослушивания
         await self.client.run_until_disconnected()
     
-    def _load_state(self) -> int:
-        """Загружает сохраненное состояние индекса целевого чата."""
+    @staticmethod
+    def _parse_chat_id(chat_id: str) -> int | str:
+        """Возвращает числовой ID чата, а username или ссылку - как есть."""
         try:
-            if os.path.exists(self.state_file):
-                with open(self.state_file, 'r') as f:
-                    state = json.load(f)
-                    index = state.get('target_chat_index', 0)
-                    # Проверяем валидность индекса
-                    if 0 <= index < len(self.target_chat_ids):
-                        logger.info(f"Загружено сохраненное состояние: следующий чат #{index + 1}")
-                        return index
-                    else:
-                        logger.warning(f"Некорректный индекс в состоянии: {index}, начинаю с 0")
-        except Exception as e:
-            logger.warning(f"Не удалось загрузить состояние: {e}, начинаю с 0")
-        return 0
+            return int(chat_id)
+        except ValueError:
+            return chat_id
     
-    def _save_state(self):
-        """Сохраняет текущее состояние индекса целевого чата."""
-        try:
-            state = {
-                'target_chat_index': self.target_chat_index
-            }
-            with open(self.state_file, 'w') as f:
-                json.dump(state, f)
-        except Exception as e:
-            logger.warning(f"Не удалось сохранить состояние: {e}")
+    def _load_state(self) -> int:
+        """Возвращает сохраненный индекс целевого чата."""
+        index = self.state.target_chat_index
+        # Проверяем валидность индекса
+        if 0 <= index < len(self.target_chat_ids):
+            logger.info("Загружено сохраненное состояние: следующий чат #%s", index + 1)
+            return index
+        logger.warning("Некорректный индекс в состоянии: %s, начинаю с 0", index)
+        return 0
     
     async def handle_new_message(self, event):
         """Обрабатывает новое сообщение из исходного чата."""
         try:
-            # Получение информации о сообщении
-            message_id = event.id
-            chat_id = str(event.chat_id)
-            
-            # Проверка, что сообщение из нужного чата
-            # Сравниваем как строки, так как ID может быть в разных форматах
-            str_match = (chat_id == self.config.source_chat_id)
+            # Получение информации о сообщении (чат уже отфильтрован в events.NewMessage)
+            logger.info("Получено новое сообщение #%s из чата %s", event.id, event.chat_id)
             
-            if not str_match:
-                # Также пробуем сравнить как числа
-                try:
-                    int_chat_id = int(chat_id)
-                    int_source_id = int(self.config.source_chat_id)
-                    int_match = (int_chat_id == int_source_id)
-                    if not int_match:
-                        return
-                except (ValueError, TypeError):
-                    return
-            
-            logger.info(f"Получено новое сообщение #{message_id} из чата {chat_id}")
-            
-            # Выбор целевого чата (round-robin)
-            target_index = self.target_chat_index
-            self.target_chat_index = (self.target_chat_index + 1) % len(self.target_chat_ids)
-            target_chat_id = self.target_chat_ids[target_index]
-            target_entity = self.target_chat_entities[target_index]
-            
-            if target_entity is None:
-                logger.error(f"Целевой чат {target_chat_id} не был загружен при старте, пропускаю сообщение")
+            if self._catchup_buffer is not None:
+                # Идет догонялка: сообщение будет добавлено после пропущенных
+                self._catchup_buffer.append(event.message)
                 return
             
-            # Пересылка сообщения (используем entity вместо ID для надежности)
-            try:
-                await self.client.forward_messages(
-                    entity=target_entity,
-                    messages=event.message
-                )
-                logger.info(
-                    f"Сообщение #{message_id} успешно переслано в чат {target_chat_id} "
-                    f"(следующий чат: {self.target_chat_ids[self.target_chat_index]})"
-                )
-                # Сохраняем состояние после успешной пересылки
-                self._save_state()
-            except Exception as e:
-                logger.error(
-                    f"Ошибка при пересылке сообщения #{message_id} в чат {target_chat_id}: {e}"
-                )
+            # Сообщение уходит в текущую пачку, пересылка выполняется в фоне
+            self.batcher.add(event.message)
                 
         except Exception as e:
-            logger.error(f"Ошибка при обработке сообщения: {e}", exc_info=True)
+            logger.error("Ошибка при обработке сообщения: %s", e, exc_info=True)
+    
+    async def catch_up(self):
+        """Добавляет в пачки сообщения, пропущенные с последней пересылки, и пропуски прошлых запусков."""
+        last_message_id = self.state.last_forwarded_message_id
+        gaps = self.state.gaps
+        if (not last_message_id and not gaps) or FORWARD_CATCHUP_LIMIT <= 0:
+            return
+        
+        # Обработчик уже зарегистрирован: новые сообщения откладываются до конца догонялки
+        self._catchup_buffer = []
+        # Пропуски прошлых запусков: сообщения после них уже пересланы, догоняем только сами пропуски
+        gap_messages = [await self._fetch_missed(gap_from, gap_to) for gap_from, gap_to in gaps]
+        missed = await self._fetch_missed(last_message_id) if last_message_id else []
+        
+        # Дальше до конца метода нет await: новые сообщения не вклиниваются между пропущенными
+        buffered, self._catchup_buffer = self._catchup_buffer, None
+        
+        for gap, messages in zip(gaps, gap_messages):
+            if messages is None:
+                logger.warning("Пропуск #%s-#%s снова не догнан, повторю при следующем запуске", gap[0] + 1, gap[1] - 1)
+                continue
+            caught_up = self._add_missed(messages, gap[0])
+            # Пропуск закрывается по мере пересылки найденных сообщений
+            self.state.replace_gap(gap, (caught_up[0].id - 1, caught_up[-1].id + 1) if caught_up else None)
+        
+        if missed is None:
+            # Отметка двигается дальше вместе с новыми сообщениями, а пропуск догоняется при следующем запуске
+            self.state.add_gap(last_message_id)
+            logger.warning("Сообщения после #%s будут догнаны при следующем запуске", last_message_id)
+            missed = []
+        
+        newest_id = missed[0].id if missed else last_message_id
+        self._add_missed(missed, last_message_id)
+        for message in buffered:
+            if message.id > newest_id:
+                self.batcher.add(message)
+    
+    def _add_missed(self, missed, last_message_id):
+        """Добавляет в пачки сообщения, полученные _fetch_missed, и возвращает добавленные (от старых к новым)."""
+        if len(missed) > FORWARD_CATCHUP_LIMIT:
+            skipped_up_to = missed.pop().id
+            logger.warning(
+                "Пропущено больше %s сообщений: сообщения #%s-#%s не будут пересланы",
+                FORWARD_CATCHUP_LIMIT,
+                last_message_id + 1,
+                skipped_up_to,
+            )
+        
+        # iter_messages возвращает сообщения от новых к старым; служебные не пересылаются, как и в NewMessage
+        caught_up = [message for message in reversed(missed) if message.action is None]
+        for message in caught_up:
+            self.batcher.add(message)
+        if caught_up:
+            logger.info("Догоняю пропущенные сообщения: %s шт. после #%s", len(caught_up), last_message_id)
+        return caught_up
+    
+    async def _fetch_missed(self, last_message_id, before_message_id=0):
+        """
+        Возвращает сообщения новее last_message_id (от новых к старым, не больше лимита + 1).
+        
+        Если задан before_message_id, только сообщения старше него. Ошибки и FloodWait
+        повторяются до FORWARD_CATCHUP_ATTEMPTS раз. Returns None, если получить не удалось.
+        """
+        for attempt in range(1, FORWARD_CATCHUP_ATTEMPTS + 1):
+            try:
+                # Берем на одно больше лимита, чтобы понять, были ли пропущены более старые сообщения.
+                # Telethon запрашивает историю страницами по 100 сообщений
+                return [
+                    message
+                    async for message in self.client.iter_messages(
+                        self.source_peer,
+                        min_id=last_message_id,
+                        max_id=before_message_id,
+                        limit=FORWARD_CATCHUP_LIMIT + 1,
+                    )
+                ]
+            except FloodWaitError as e:
+                error = e
+                delay = e.seconds
+            except Exception as e:
+                error = e
+                delay = min(2 ** attempt, FORWARD_CATCHUP_MAX_WAIT)
+            
+            # Пока идет догонялка, новые сообщения откладываются: долго ждать нельзя
+            if attempt == FORWARD_CATCHUP_ATTEMPTS or delay > FORWARD_CATCHUP_MAX_WAIT:
+                logger.error("Не удалось получить сообщения после #%s: %s", last_message_id, error)
+                return None
+            logger.warning(
+                "Ошибка при получении пропущенных сообщений (попытка %s/%s), повтор через %s с: %s",
+                attempt,
+                FORWARD_CATCHUP_ATTEMPTS,
+                delay,
+                error,
+            )
+            await asyncio.sleep(delay)
+    
+    async def forward_batch(self, messages):
+        """Ставит пачку сообщений в очередь пересылки в следующий по очереди целевой чат."""
+        message_ids = [message.id for message in messages]
+        
+        # Выбор целевого чата (round-robin): вся пачка уходит в один чат
+        target_chat_id = self.target_chat_ids[self.target_chat_index]
+        self.target_chat_index = (self.target_chat_index + 1) % len(self.target_chat_ids)
+        
+        await self.outbox.put(target_chat_id, message_ids)
+        # Состояние обновляется после постановки в очередь: пачка уже на диске
+        self.state.update(self.target_chat_index, message_ids)
+    
+    async def deliver(self, target_chat_id, message_ids):
+        """Пересылает пачку сообщений одним вызовом; ошибки обрабатывает очередь пересылки."""
+        # Пачка могла остаться в очереди с запуска, когда в конфигурации был другой список чатов
+        if target_chat_id not in self.target_chat_ids:
+            raise PermanentForwardError(f"целевого чата {target_chat_id} больше нет в конфигурации")
+        
+        # Entity вместо ID для надежности; если чат не загрузился при старте, ошибка уйдет в повтор
+        target_entity = await self._get_target_entity(target_chat_id)
+        request = functions.messages.ForwardMessagesRequest(
+            from_peer=await self.client.get_input_entity(self.source_peer),
+            id=message_ids,
+            to_peer=await self.client.get_input_entity(target_entity),
+        )
+        # FloodWait не пережидается внутри клиента только здесь: паузу по каждому чату выдерживает очередь пересылок
+        await self.client(request, flood_sleep_threshold=0)
+        logger.info("Сообщения %s успешно пересланы в чат %s", message_ids, target_chat_id)
+    
+    async def _get_target_entity(self, target_chat_id):
+        """Возвращает entity целевого чата, загружая его при первом обращении."""
+        target_entity = self.target_chat_entities.get(target_chat_id)
+        if target_entity is None:
+            target_entity = await self.client.get_entity(self._parse_chat_id(target_chat_id))
+            self.target_chat_entities[target_chat_id] = target_entity
+        return target_entity
     
     async def stop(self):
         """Останавливает клиент."""
+        # Досылаем накопленные пачки, пока клиент еще подключен
+        await self.batcher.stop()
+        await self.outbox.stop()
+        await self.state.close()
         if self.client:
             await self.client.disconnect()
             logger.info("Клиент остановлен")
@@ -230,12 +375,17 @@ async def main():
             await forwarder.stop()
             
     except ValueError as e:
-        logger.error(f"Ошибка конфигурации: {e}")
+        logger.error("Ошибка конфигурации: %s", e)
         sys.exit(1)
     except Exception as e:
-        logger.error(f"Критическая ошибка: {e}", exc_info=True)
+        logger.error("Критическая ошибка: %s", e, exc_info=True)
         sys.exit(1)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    log_listener.start()
+    try:
+        asyncio.run(main())
+    finally:
+        # Дописываем накопленные в очереди записи
+        log_listener.stop()
@@ -0,0 +1,216 @@
+"""Надежная очередь пересылки сообщений на SQLite."""
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+import threading
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from telethon.errors import FloodWaitError
+
+logger = logging.getLogger(__name__)
+
+# Первая необработанная пачка каждого целевого чата: следующие пачки чата ждут ее пересылки
+_HEADS_QUERY = (
+    "SELECT id, target_chat_id, message_ids, attempts, next_attempt_at FROM outbox "
+    "WHERE id IN (SELECT MIN(id) FROM outbox WHERE status = 'pending' GROUP BY target_chat_id) ORDER BY id"
+)
+
+
+class PermanentForwardError(Exception):
+    """Ошибка пересылки, которую бессмысленно повторять."""
+
+
+class Outbox:
+    """
+    Очередь пересылок, сохраняемая в SQLite.
+
+    Каждая запись - пачка ID сообщений и ID целевого чата из конфигурации
+    (не позиция в списке чатов: список может измениться между запусками). Обработчик
+    пересылает записи по порядку и удаляет их только после успешной пересылки,
+    поэтому необработанные пачки переживают перезапуск. FloodWait ставит на
+    паузу только свой целевой чат, остальные ошибки повторяются с
+    экспоненциальной задержкой до max_attempts попыток. Между пересылками в
+    один чат выдерживается не меньше target_interval секунд.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        deliver: Callable[[str, List[int]], Awaitable[None]],
+        max_attempts: int = 10,
+        base_delay: float = 2.0,
+        max_delay: float = 300.0,
+        target_interval: float = 1.0,
+    ):
+        self._path = path
+        self._deliver = deliver
+        self._max_attempts = max_attempts
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._target_interval = target_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping = False
+        # ID целевого чата -> время, раньше которого в него нельзя пересылать
+        self._target_ready_at: Dict[str, float] = {}
+
+    async def open(self):
+        """Открывает базу и создает таблицу очереди."""
+        await asyncio.to_thread(self._open)
+
+    def start(self):
+        """Запускает фоновую пересылку."""
+        if self._worker is None:
+            self._stopping = False
+            self._worker = asyncio.create_task(self._run())
+
+    async def put(self, target_chat_id: str, message_ids: List[int]):
+        """Сохраняет пачку в очередь; возвращается после записи на диск."""
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO outbox (target_chat_id, message_ids, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+            (target_chat_id, json.dumps(message_ids), 0.0, time.time()),
+        )
+        self._wakeup.set()
+
+    async def pending(self) -> int:
+        rows = await asyncio.to_thread(self._query, "SELECT COUNT(*) FROM outbox WHERE status = 'pending'", ())
+        return rows[0][0]
+
+    async def stop(self, timeout: float = 10.0):
+        """Дает текущей пересылке завершиться (не дольше timeout) и останавливает обработчик."""
+        if self._worker is not None:
+            self._stopping = True
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(self._worker, timeout)
+            except asyncio.TimeoutError:
+                # Незавершенная пачка останется в очереди и будет переслана после перезапуска
+                logger.warning("Пересылка не завершилась за %s с, останавливаю", timeout)
+            self._worker = None
+
+        if self._conn is not None:
+            await asyncio.to_thread(self._conn.close)
+            self._conn = None
+
+    async def _run(self):
+        errors = 0
+        while not self._stopping:
+            # Очищаем до чтения очереди, чтобы не пропустить пачку, добавленную во время чтения
+            self._wakeup.clear()
+            try:
+                heads = await asyncio.to_thread(self._query, _HEADS_QUERY, ())
+                delivered = await self._process_next(heads)
+            except Exception as e:
+                # Ошибка базы (заблокирована, нет места на диске) не должна останавливать пересылку
+                errors += 1
+                delay = min(self._base_delay * 2 ** (errors - 1), self._max_delay)
+                logger.error("Ошибка очереди пересылки, повтор через %.1f с: %s", delay, e, exc_info=True)
+                await self._wait(delay)
+                continue
+            errors = 0
+
+            if not delivered and not self._stopping:
+                await self._sleep_until_due(heads)
+
+    async def _process_next(self, heads: list) -> bool:
+        """Пересылает первую готовую пачку; heads - первые пачки каждого целевого чата по порядку."""
+        now = time.time()
+        for row_id, target_chat_id, message_ids, attempts, next_attempt_at in heads:
+            # В один чат пачки уходят строго по порядку; чат на паузе (FloodWait,
+            # лимит частоты, ожидание повтора) не задерживает пересылку в другие чаты
+            if next_attempt_at > now or self._target_ready_at.get(target_chat_id, 0.0) > now:
+                continue
+            await self._process(row_id, target_chat_id, json.loads(message_ids), attempts)
+            # Перечитываем очередь: паузы и порядок могли измениться
+            return True
+        return False
+
+    async def _process(self, row_id: int, target_chat_id: str, message_ids: List[int], attempts: int):
+        try:
+            await self._deliver(target_chat_id, message_ids)
+        except FloodWaitError as e:
+            logger.warning("FloodWait при пересылке в чат %s: ждем %s с", target_chat_id, e.seconds)
+            self._target_ready_at[target_chat_id] = time.time() + e.seconds
+            return
+        except PermanentForwardError as e:
+            logger.error("Пачка %s не может быть переслана: %s", message_ids, e)
+            await asyncio.to_thread(
+                self._execute, "UPDATE outbox SET status = 'failed', last_error = ? WHERE id = ?", (str(e), row_id)
+            )
+            return
+        except Exception as e:
+            attempts += 1
+            if attempts >= self._max_attempts:
+                logger.error("Пачка %s не переслана после %s попыток: %s", message_ids, attempts, e)
+                await asyncio.to_thread(
+                    self._execute,
+                    "UPDATE outbox SET status = 'failed', attempts = ?, last_error = ? WHERE id = ?",
+                    (attempts, str(e), row_id),
+                )
+                return
+
+            delay = min(self._base_delay * 2 ** (attempts - 1), self._max_delay)
+            logger.warning(
+                "Ошибка при пересылке пачки %s (попытка %s/%s), повтор через %.1f с: %s",
+                message_ids,
+                attempts,
+                self._max_attempts,
+                delay,
+                e,
+            )
+            await asyncio.to_thread(
+                self._execute,
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (attempts, time.time() + delay, str(e), row_id),
+            )
+            return
+
+        self._target_ready_at[target_chat_id] = time.time() + self._target_interval
+        await asyncio.to_thread(self._execute, "DELETE FROM outbox WHERE id = ?", (row_id,))
+
+    async def _sleep_until_due(self, heads: list):
+        """Ждет новую пачку, окончание паузы чата или время повтора."""
+        # Для каждого чата пачка станет доступна не раньше повтора и не раньше конца паузы чата
+        wakeups = [
+            max(next_attempt_at, self._target_ready_at.get(target_chat_id, 0.0))
+            for _, target_chat_id, _, _, next_attempt_at in heads
+        ]
+        await self._wait(max(min(wakeups) - time.time(), 0.05) if wakeups else None)
+
+    async def _wait(self, timeout: Optional[float]):
+        """Ждет не дольше timeout; новая пачка или остановка прерывают ожидание."""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _open(self):
+        conn = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "target_chat_id TEXT NOT NULL, "
+            "message_ids TEXT NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'pending', "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL, "
+            "created_at REAL NOT NULL, "
+            "last_error TEXT)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (status, target_chat_id, id)")
+        self._conn = conn
+
+    def _execute(self, sql: str, params: tuple):
+        with self._lock:
+            self._conn.execute(sql, params)
+
+    def _query(self, sql: str, params: tuple) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
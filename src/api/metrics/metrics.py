@@ -0,0 +1,16 @@
+from fastapi import Depends
+from fastapi.responses import PlainTextResponse
+
+from src.api.metrics.router import metrics_router
+from src.integrations.metrics import get_metrics_registry
+from src.utils.metrics import MetricsRegistry
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@metrics_router.get('/metrics', response_class=PlainTextResponse)
+async def get_metrics(
+    registry: MetricsRegistry = Depends(get_metrics_registry),
+) -> PlainTextResponse:
+    """Возвращает метрики приложения в текстовом формате Prometheus."""
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
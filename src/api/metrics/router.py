@@ -0,0 +1,3 @@
+from fastapi import APIRouter
+
+metrics_router = APIRouter(prefix='')
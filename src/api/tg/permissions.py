@@ -0,0 +1,131 @@
+"""Проверка прав бота в чате - общая для одиночного и пакетного API."""
+from typing import Any
+
+from aiogram import Bot
+from aiogram.enums import ChatMemberStatus
+from aiogram.types import Chat, ChatMemberAdministrator, ChatMemberMember, ChatMemberRestricted, ChatMemberUnion
+
+from src.integrations.chat_info import ChatInfoCache
+from src.logger import logger
+from src.utils.chat_registry import ChatRegistry
+from src.utils.rate_limiter import TokenBucket
+
+# Необходимые права в зависимости от типа чата
+REQUIRED_PERMISSIONS = {
+    'for_groups': ['can_read_messages'],
+}
+
+
+class BotNotMember(Exception):
+    """Бот не состоит в чате."""
+
+    def __init__(self, chat_id: int) -> None:
+        super().__init__(f'Bot is not a member of chat {chat_id}')
+        self.chat_id = chat_id
+
+
+async def check_chat_permissions(
+    bot: Bot,
+    chat_info: ChatInfoCache,
+    chat_registry: ChatRegistry,
+    chat_id: int,
+    bot_id: int,
+    budget: TokenBucket | None = None,
+) -> dict[str, Any]:
+    """
+    Проверяет права бота в чате: по реестру чатов, а для неизвестных реестру чатов - через Bot API.
+
+    Запросы к Bot API ждут токен из budget, если он передан.
+
+    Raises:
+        BotNotMember: бот не состоит в чате
+    """
+    record = chat_registry.get(chat_id)
+    if record is not None:
+        logger.debug('PERMISSIONS CHECK REGISTRY: chat_id=%s', chat_id)
+        return build_permissions_report(record.chat, record.member)
+
+    chat = await chat_info.get_chat(bot, chat_id, budget)
+    logger.debug('PERMISSIONS CHECK CHAT: chat_id=%s, chat_title=%s, chat_type=%s', chat_id, chat.title if hasattr(chat, 'title') else None, chat.type)
+
+    # Получаем информацию о членстве бота
+    try:
+        chat_member = await chat_info.get_chat_member(bot, chat_id, bot_id, budget)
+    except Exception as e:
+        logger.warning('PERMISSIONS CHECK NOT MEMBER: chat_id=%s, error=%s', chat_id, e)
+        raise BotNotMember(chat_id) from e
+
+    return build_permissions_report(chat, chat_member)
+
+
+def build_permissions_report(chat: Chat, chat_member: ChatMemberUnion) -> dict[str, Any]:
+    """Собирает ответ API: текущие, необходимые и отсутствующие права бота."""
+    # Безопасно получаем строковое значение статуса (может быть enum или строка)
+    status_value = chat_member.status.value if hasattr(chat_member.status, 'value') else str(chat_member.status)
+    logger.info('PERMISSIONS CHECK STATUS: chat_id=%s, bot_status=%s', chat.id, status_value)
+
+    # Извлекаем текущие права
+    current_permissions: dict[str, Any] = {
+        'status': status_value,
+    }
+
+    # Проверяем, является ли бот участником (обрабатываем как enum, так и строку)
+    is_member = (
+        chat_member.status == ChatMemberStatus.MEMBER or
+        chat_member.status == ChatMemberStatus.ADMINISTRATOR or
+        chat_member.status == ChatMemberStatus.RESTRICTED or
+        str(chat_member.status) in ('member', 'administrator', 'restricted')
+    )
+
+    # Для администраторов получаем детальные права
+    if isinstance(chat_member, ChatMemberAdministrator):
+        current_permissions.update({
+            'can_read_messages': True,  # Администратор всегда может читать
+            'can_post_messages': chat_member.can_post_messages if hasattr(chat_member, 'can_post_messages') else None,
+            'can_edit_messages': chat_member.can_edit_messages if hasattr(chat_member, 'can_edit_messages') else None,
+            'can_delete_messages': chat_member.can_delete_messages if hasattr(chat_member, 'can_delete_messages') else None,
+            'can_restrict_members': chat_member.can_restrict_members if hasattr(chat_member, 'can_restrict_members') else None,
+            'can_promote_members': chat_member.can_promote_members if hasattr(chat_member, 'can_promote_members') else None,
+            'can_invite_users': chat_member.can_invite_users if hasattr(chat_member, 'can_invite_users') else None,
+            'can_pin_messages': chat_member.can_pin_messages if hasattr(chat_member, 'can_pin_messages') else None,
+            'can_manage_chat': chat_member.can_manage_chat if hasattr(chat_member, 'can_manage_chat') else None,
+            'can_manage_video_chats': chat_member.can_manage_video_chats if hasattr(chat_member, 'can_manage_video_chats') else None,
+        })
+    elif isinstance(chat_member, ChatMemberMember):
+        # Обычный участник - может читать если privacy mode отключен или бот админ
+        current_permissions['can_read_messages'] = True
+    elif isinstance(chat_member, ChatMemberRestricted):
+        # Ограниченный участник
+        current_permissions['can_read_messages'] = chat_member.can_read_messages if hasattr(chat_member, 'can_read_messages') else False
+        current_permissions['can_send_messages'] = chat_member.can_send_messages if hasattr(chat_member, 'can_send_messages') else False
+        current_permissions['can_send_media_messages'] = chat_member.can_send_media_messages if hasattr(chat_member, 'can_send_media_messages') else False
+        current_permissions['can_send_other_messages'] = chat_member.can_send_other_messages if hasattr(chat_member, 'can_send_other_messages') else False
+        current_permissions['can_add_web_page_previews'] = chat_member.can_add_web_page_previews if hasattr(chat_member, 'can_add_web_page_previews') else False
+
+    # Определяем отсутствующие права
+    missing_permissions = []
+    if chat.type in ('group', 'supergroup'):
+        required = REQUIRED_PERMISSIONS['for_groups']
+        for perm in required:
+            if perm == 'can_read_messages' and not current_permissions.get('can_read_messages', False):
+                missing_permissions.append(perm)
+
+    logger.info(
+        'PERMISSIONS CHECK RESULT: chat_id=%s, is_member=%s, status=%s, missing_permissions=%s',
+        chat.id,
+        is_member,
+        current_permissions.get('status'),
+        missing_permissions,
+    )
+
+    return {
+        'is_member': is_member,
+        'chat_info': {
+            'chat_id': chat.id,
+            'chat_title': chat.title if hasattr(chat, 'title') else None,
+            'chat_type': chat.type,
+        },
+        'current_permissions': current_permissions,
+        'required_permissions': REQUIRED_PERMISSIONS,
+        'missing_permissions': missing_permissions,
+    }
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+
+# Максимальное число чатов в одном запросе пакетной проверки прав
+MAX_BULK_CHATS = 1000
+
+
+class ChatsPermissionsRequest(BaseModel):
+    chat_ids: list[int] = Field(min_length=1, max_length=MAX_BULK_CHATS)
@@ -1,90 +1,112 @@
+import hmac
+import time
 import asyncio
-from asyncio import Task
-from typing import Any
-
-from aiogram import Bot, Dispatcher, types
-from aiogram.enums import ChatMemberStatus
-from aiogram.types import ChatMemberAdministrator, ChatMemberMember, ChatMemberRestricted
-from fastapi import Depends, HTTPException
-from fastapi.responses import ORJSONResponse
+from typing import Any, AsyncIterator
+
+import orjson
+from aiogram import Bot
+from fastapi import Depends, Header, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from starlette.requests import Request
 
+from src.api.tg.permissions import BotNotMember, check_chat_permissions
 from src.api.tg.router import tg_router
-from src.integrations.tg_bot import get_dispatcher, get_tg_bot
+from src.api.tg.schemas import ChatsPermissionsRequest
+from src.integrations import metrics
+from src.integrations.chat_info import ChatInfoCache, get_chat_info_cache
+from src.integrations.tg_bot import get_tg_bot, get_update_deduplicator, get_update_queue
 from src.logger import logger
-from src.utils.background_tasks import tg_background_tasks
+from src.utils.chat_registry import ChatRegistry, get_chat_registry
+from src.utils.dedup import UpdateDeduplicator
+from src.utils.rate_limiter import TokenBucket
+from src.utils.raw_update import decode_update, parse_update_meta
+from src.utils.update_queue import QueueClosed, QueueOverloaded, UpdateQueue
+
+from conf.config import settings
+
+# Отдельная частота запросов к Bot API для пакетной проверки прав: она не должна
+# вытеснять обработку обновлений, поэтому ограничена независимо и заметно ниже
+bulk_lookup_budget = TokenBucket(settings.permissions_bulk_rate, settings.permissions_bulk_rate)
 
 
 @tg_router.post('/tg')
 async def tg_api(
     request: Request,
-    dp: Dispatcher = Depends(get_dispatcher),
-    bot: Bot = Depends(get_tg_bot),
+    update_queue: UpdateQueue = Depends(get_update_queue),
+    deduplicator: UpdateDeduplicator = Depends(get_update_deduplicator),
 ) -> ORJSONResponse:
-    data = await request.json()
-    update = types.Update(**data)
+    started_at = time.perf_counter()
+    try:
+        data = decode_update(await request.body())
+    except ValueError:
+        metrics.webhook_requests.labels('unknown', 'invalid').inc()
+        raise HTTPException(status_code=400, detail='Invalid update payload')
 
-    # Логируем тип обновления
-    update_type = None
-    chat_id = None
-    user_id = None
-    
-    if update.message:
-        update_type = 'message'
-        chat_id = update.message.chat.id if update.message.chat else None
-        user_id = update.message.from_user.id if update.message.from_user else None
-    elif update.edited_message:
-        update_type = 'edited_message'
-        chat_id = update.edited_message.chat.id if update.edited_message.chat else None
-        user_id = update.edited_message.from_user.id if update.edited_message.from_user else None
-    elif update.deleted_messages:
-        # Обработка удаленных сообщений (если Telegram начнет отправлять такие события)
-        update_type = 'deleted_messages'
-        chat_id = update.deleted_messages.chat.id if update.deleted_messages.chat else None
-        logger.info(
-            'DELETED MESSAGES UPDATE RECEIVED: chat_id=%s, message_ids=%s',
-            chat_id,
-            update.deleted_messages.message_ids if hasattr(update.deleted_messages, 'message_ids') else None,
-        )
-        # Примечание: Обработка deleted_messages должна быть реализована через специальный обработчик
-        # если Telegram начнет отправлять такие события через Bot API
-    elif update.my_chat_member:
-        update_type = 'my_chat_member'
-        chat_id = update.my_chat_member.chat.id if update.my_chat_member.chat else None
-        user_id = update.my_chat_member.from_user.id if update.my_chat_member.from_user else None
-    elif update.chat_member:
-        update_type = 'chat_member'
-        chat_id = update.chat_member.chat.id if update.chat_member.chat else None
-        user_id = update.chat_member.from_user.id if update.chat_member.from_user else None
-    else:
+    # Тип обновления, чат и пользователь читаются из сырого словаря без валидации
+    update_id, update_type, chat_id, user_id = parse_update_meta(data)
+
+    # Повторы (Telegram переотправляет обновление при медленном ответе) отбрасываем сразу
+    if update_id is not None and not await deduplicator.check_and_add(update_id):
+        logger.info('WEBHOOK UPDATE DUPLICATE: update_id=%s, update_type=%s', update_id, update_type)
+        metrics.webhook_requests.labels(update_type, 'duplicate').inc()
+        return ORJSONResponse({'success': True})
+
+    if update_type == 'unknown':
         # Логируем неизвестные типы обновлений для отладки
-        update_type = 'unknown'
-        logger.debug('UNKNOWN UPDATE TYPE: update_id=%s, update_keys=%s', update.update_id, list(update.model_dump().keys()))
+        logger.debug('UNKNOWN UPDATE TYPE: update_id=%s, update_keys=%s', update_id, list(data))
 
     logger.info(
-        'WEBHOOK UPDATE RECEIVED: update_id=%s, update_type=%s, chat_id=%s, user_id=%s, '
-        'active_background_tasks=%s',
-        update.update_id,
+        'WEBHOOK UPDATE RECEIVED: update_id=%s, update_type=%s, chat_id=%s, user_id=%s, queue_depth=%s',
+        update_id,
         update_type,
         chat_id,
         user_id,
-        len(tg_background_tasks),
+        update_queue.depth,
     )
 
-    task: Task[Any] = asyncio.create_task(dp.feed_webhook_update(bot, update))
-    tg_background_tasks.add(task)
+    # Обновления одного чата обрабатываются по порядку одним воркером
+    queue_key = chat_id or user_id or update_id
+    try:
+        update_queue.put(data, queue_key)
+    except QueueOverloaded as e:
+        # Очередь закрыта - приложение останавливается, обновление получит следующий экземпляр
+        reason = 'closed' if isinstance(e, QueueClosed) else 'full'
+        logger.warning('WEBHOOK UPDATE REJECTED: update_id=%s, update_type=%s, queue=%s', update_id, update_type, reason)
+        # Telegram повторит обновление - оно не должно считаться дубликатом
+        if update_id is not None:
+            await deduplicator.forget(update_id)
+        metrics.webhook_requests.labels(update_type, reason).inc()
+        raise HTTPException(status_code=503, detail=f'Update queue is {reason}', headers={'Retry-After': '1'})
+
+    logger.debug('WEBHOOK UPDATE PROCESSING: update_id=%s, update_type=%s', update_id, update_type)
+    metrics.webhook_requests.labels(update_type, 'accepted').inc()
+    metrics.webhook_accept_seconds.observe(time.perf_counter() - started_at)
 
-    task.add_done_callback(tg_background_tasks.discard)
+    return ORJSONResponse({'success': True})
 
-    logger.debug('WEBHOOK UPDATE PROCESSING: update_id=%s, update_type=%s', update.update_id, update_type)
 
-    return ORJSONResponse({'success': True})
+@tg_router.get('/tg/queue')
+async def get_queue_stats(
+    update_queue: UpdateQueue = Depends(get_update_queue),
+) -> ORJSONResponse:
+    """Возвращает состояние очереди обновлений: глубину, время ожидания и загрузку воркеров."""
+    return ORJSONResponse(update_queue.stats())
+
+
+@tg_router.get('/tg/dedup')
+async def get_dedup_stats(
+    deduplicator: UpdateDeduplicator = Depends(get_update_deduplicator),
+) -> ORJSONResponse:
+    """Возвращает счетчики дедупликации update_id: повторы (hits) и новые обновления (misses)."""
+    return ORJSONResponse(deduplicator.stats())
 
 
 @tg_router.get('/tg/chat/{chat_id}/permissions')
 async def get_chat_permissions(
     chat_id: int,
     bot: Bot = Depends(get_tg_bot),
+    chat_info: ChatInfoCache = Depends(get_chat_info_cache),
+    chat_registry: ChatRegistry = Depends(get_chat_registry),
 ) -> ORJSONResponse:
     """
     Проверяет права бота в указанном чате.
@@ -94,95 +116,74 @@ async def get_chat_permissions(
     """
     logger.info('PERMISSIONS CHECK REQUEST: chat_id=%s', chat_id)
     try:
-        # Получаем информацию о чате
-        chat = await bot.get_chat(chat_id)
-        bot_info = await bot.get_me()
-        logger.debug('PERMISSIONS CHECK: chat_id=%s, chat_title=%s, chat_type=%s', chat_id, chat.title if hasattr(chat, 'title') else None, chat.type)
+        bot_info = await chat_info.get_me(bot)
+        return ORJSONResponse(await check_chat_permissions(bot, chat_info, chat_registry, chat_id, bot_info.id))
 
-        # Получаем информацию о членстве бота
-        try:
-            chat_member = await bot.get_chat_member(chat_id, bot_info.id)
-        except Exception as e:
-            logger.warning('PERMISSIONS CHECK: Bot is not a member of chat, chat_id=%s, error=%s', chat_id, e)
-            raise HTTPException(status_code=404, detail=f'Bot is not a member of chat {chat_id}')
-
-        # Безопасно получаем строковое значение статуса (может быть enum или строка)
-        status_value = chat_member.status.value if hasattr(chat_member.status, 'value') else str(chat_member.status)
-        logger.info('PERMISSIONS CHECK: chat_id=%s, bot_status=%s', chat_id, status_value)
-
-        # Определяем необходимые права в зависимости от типа чата
-        required_permissions = {
-            'for_groups': ['can_read_messages'],
-        }
-        
-        # Извлекаем текущие права
-        current_permissions = {
-            'status': status_value,
-        }
-
-        # Проверяем, является ли бот участником (обрабатываем как enum, так и строку)
-        is_member = (
-            chat_member.status == ChatMemberStatus.MEMBER or
-            chat_member.status == ChatMemberStatus.ADMINISTRATOR or
-            chat_member.status == ChatMemberStatus.RESTRICTED or
-            str(chat_member.status) in ('member', 'administrator', 'restricted')
-        )
-
-        # Для администраторов получаем детальные права
-        if isinstance(chat_member, ChatMemberAdministrator):
-            current_permissions.update({
-                'can_read_messages': True,  # Администратор всегда может читать
-                'can_post_messages': chat_member.can_post_messages if hasattr(chat_member, 'can_post_messages') else None,
-                'can_edit_messages': chat_member.can_edit_messages if hasattr(chat_member, 'can_edit_messages') else None,
-                'can_delete_messages': chat_member.can_delete_messages if hasattr(chat_member, 'can_delete_messages') else None,
-                'can_restrict_members': chat_member.can_restrict_members if hasattr(chat_member, 'can_restrict_members') else None,
-                'can_promote_members': chat_member.can_promote_members if hasattr(chat_member, 'can_promote_members') else None,
-                'can_invite_users': chat_member.can_invite_users if hasattr(chat_member, 'can_invite_users') else None,
-                'can_pin_messages': chat_member.can_pin_messages if hasattr(chat_member, 'can_pin_messages') else None,
-                'can_manage_chat': chat_member.can_manage_chat if hasattr(chat_member, 'can_manage_chat') else None,
-                'can_manage_video_chats': chat_member.can_manage_video_chats if hasattr(chat_member, 'can_manage_video_chats') else None,
-            })
-        elif isinstance(chat_member, ChatMemberMember):
-            # Обычный участник - может читать если privacy mode отключен или бот админ
-            current_permissions['can_read_messages'] = True
-        elif isinstance(chat_member, ChatMemberRestricted):
-            # Ограниченный участник
-            current_permissions['can_read_messages'] = chat_member.can_read_messages if hasattr(chat_member, 'can_read_messages') else False
-            current_permissions['can_send_messages'] = chat_member.can_send_messages if hasattr(chat_member, 'can_send_messages') else False
-            current_permissions['can_send_media_messages'] = chat_member.can_send_media_messages if hasattr(chat_member, 'can_send_media_messages') else False
-            current_permissions['can_send_other_messages'] = chat_member.can_send_other_messages if hasattr(chat_member, 'can_send_other_messages') else False
-            current_permissions['can_add_web_page_previews'] = chat_member.can_add_web_page_previews if hasattr(chat_member, 'can_add_web_page_previews') else False
-
-        # Определяем отсутствующие права
-        missing_permissions = []
-        if chat.type in ('group', 'supergroup'):
-            required = required_permissions['for_groups']
-            for perm in required:
-                if perm == 'can_read_messages' and not current_permissions.get('can_read_messages', False):
-                    missing_permissions.append(perm)
-
-        logger.info(
-            'PERMISSIONS CHECK RESULT: chat_id=%s, is_member=%s, status=%s, missing_permissions=%s',
-            chat_id,
-            is_member,
-            current_permissions.get('status'),
-            missing_permissions,
-        )
-
-        return ORJSONResponse({
-            'is_member': is_member,
-            'chat_info': {
-                'chat_id': chat.id,
-                'chat_title': chat.title if hasattr(chat, 'title') else None,
-                'chat_type': chat.type,
-            },
-            'current_permissions': current_permissions,
-            'required_permissions': required_permissions,
-            'missing_permissions': missing_permissions,
-        })
-
-    except HTTPException:
-        raise
+    except BotNotMember as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error('Failed to get chat permissions: %s', e, exc_info=True)
         raise HTTPException(status_code=500, detail=f'Failed to get chat permissions: {str(e)}')
+
+
+def verify_api_token(x_api_token: str | None = Header(None)) -> None:
+    """Пускает только запросы с заголовком X-Api-Token, равным PERMISSIONS_API_TOKEN."""
+    if not settings.permissions_api_token:
+        raise HTTPException(status_code=403, detail='Bulk permissions API is disabled: PERMISSIONS_API_TOKEN is not set')
+    if x_api_token is None or not hmac.compare_digest(x_api_token, settings.permissions_api_token):
+        raise HTTPException(status_code=401, detail='Invalid API token')
+
+
+@tg_router.post(
+    '/tg/chats/permissions',
+    response_class=StreamingResponse,
+    dependencies=[Depends(verify_api_token)],
+)
+async def get_chats_permissions(
+    body: ChatsPermissionsRequest,
+    bot: Bot = Depends(get_tg_bot),
+    chat_info: ChatInfoCache = Depends(get_chat_info_cache),
+    chat_registry: ChatRegistry = Depends(get_chat_registry),
+) -> StreamingResponse:
+    """
+    Проверяет права бота сразу в нескольких чатах.
+
+    Чаты проверяются параллельно (не больше PERMISSIONS_BULK_CONCURRENCY одновременно, не больше
+    PERMISSIONS_BULK_RATE запросов к Bot API в секунду), результаты отдаются в формате NDJSON
+    по мере готовности: по строке на чат, в поле error - ошибка проверки. Нужен заголовок X-Api-Token.
+    """
+    chat_ids = list(dict.fromkeys(body.chat_ids))
+    logger.info('PERMISSIONS BULK CHECK REQUEST: chats=%s', len(chat_ids))
+
+    try:
+        bot_info = await chat_info.get_me(bot)
+    except Exception as e:
+        logger.error('Failed to get bot info: %s', e, exc_info=True)
+        raise HTTPException(status_code=500, detail=f'Failed to get bot info: {str(e)}')
+
+    semaphore = asyncio.Semaphore(settings.permissions_bulk_concurrency)
+
+    async def check(chat_id: int) -> dict[str, Any]:
+        async with semaphore:
+            try:
+                report = await check_chat_permissions(
+                    bot, chat_info, chat_registry, chat_id, bot_info.id, bulk_lookup_budget
+                )
+                return {'chat_id': chat_id, **report}
+            except BotNotMember as e:
+                return {'chat_id': chat_id, 'status_code': 404, 'error': str(e)}
+            except Exception as e:
+                logger.warning('PERMISSIONS BULK CHECK FAILED: chat_id=%s, error=%s', chat_id, e)
+                return {'chat_id': chat_id, 'status_code': 500, 'error': str(e)}
+
+    async def stream() -> AsyncIterator[bytes]:
+        tasks = [asyncio.create_task(check(chat_id)) for chat_id in chat_ids]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield orjson.dumps(await task) + b'\n'
+        finally:
+            # Клиент отключился - оставшиеся проверки не нужны
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type='application/x-ndjson')
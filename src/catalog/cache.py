@@ -0,0 +1,83 @@
+"""
+Кеш каталога в памяти.
+
+Обработчики читают каталог только из памяти. Фоновая задача раз в
+watch_interval дешево проверяет версию источника (для файла - mtime и
+размер) и перезагружает каталог при ее изменении, а раз в ttl
+перезагружает его безусловно - для источников без версии.
+"""
+import time
+import asyncio
+from asyncio import Task
+from typing import Callable
+
+from src.catalog.providers import Catalog, CatalogProvider
+from src.logger import logger
+
+
+class CatalogCache:
+    def __init__(self, provider: CatalogProvider, ttl: float, watch_interval: float) -> None:
+        self._provider = provider
+        self._ttl = ttl
+        self._watch_interval = watch_interval
+        self._catalog = Catalog(managers=(), marketplaces=())
+        self._loaded_at = 0.0
+        self._listeners: list[Callable[[Catalog], None]] = []
+        self._task: Task[None] | None = None
+
+    @property
+    def catalog(self) -> Catalog:
+        return self._catalog
+
+    def subscribe(self, listener: Callable[[Catalog], None]) -> None:
+        """Подписывает обработчик на изменения каталога и сразу вызывает его с текущими данными."""
+        self._listeners.append(listener)
+        listener(self._catalog)
+
+    async def refresh(self, force: bool = False) -> bool:
+        """
+        Перезагружает каталог, если изменилась версия источника или истек TTL.
+
+        Returns:
+            True, если каталог был перезагружен
+        """
+        expired = time.monotonic() - self._loaded_at >= self._ttl
+        if not force and not expired:
+            version = await self._provider.version()
+            if version is not None and version == self._catalog.version:
+                return False
+
+        catalog = await self._provider.load()
+        self._loaded_at = time.monotonic()
+        if catalog == self._catalog:
+            return False
+
+        self._catalog = catalog
+        logger.info(
+            'CATALOG RELOADED: version=%s, managers=%s, marketplaces=%s',
+            catalog.version,
+            len(catalog.managers),
+            len(catalog.marketplaces),
+        )
+        for listener in self._listeners:
+            listener(catalog)
+        return True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch(), name='catalog-watch')
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self._watch_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                # Оставляем в памяти последнюю успешно загруженную версию
+                logger.warning('CATALOG REFRESH FAILED: %s', e)
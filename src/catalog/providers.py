@@ -0,0 +1,92 @@
+"""Источники данных каталога: менеджеры и маркетплейсы."""
+import os
+import asyncio
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import yaml
+import orjson
+
+# Моки данных (используются, пока не задан CATALOG_PATH)
+MOCK_MANAGERS = [
+    {"name": "Иван Иванов", "phone": "+7 (999) 123-45-67", "telegram": "@ivan_manager"},
+    {"name": "Мария Петрова", "phone": "+7 (999) 234-56-78", "telegram": "@maria_manager"},
+]
+
+MOCK_MARKETPLACES = [
+    {"name": "Wildberries", "url": "https://www.wildberries.ru/catalog/0/search.aspx?search=товар"},
+    {"name": "Ozon", "url": "https://www.ozon.ru/search/?text=товар"},
+    {"name": "Яндекс.Маркет", "url": "https://market.yandex.ru/search?text=товар"},
+]
+
+
+@dataclass(frozen=True, slots=True)
+class Catalog:
+    managers: tuple[dict[str, Any], ...]
+    marketplaces: tuple[dict[str, Any], ...]
+    version: str | None = None
+
+
+class CatalogProvider(ABC):
+    @abstractmethod
+    async def load(self) -> Catalog:
+        """Загружает каталог из источника."""
+
+    async def version(self) -> str | None:
+        """
+        Дешевая проверка версии данных без полной загрузки.
+
+        Returns:
+            Версия данных или None, если источник не умеет ее определять
+        """
+        return None
+
+
+class StaticCatalogProvider(CatalogProvider):
+    def __init__(self, managers: list[dict[str, Any]], marketplaces: list[dict[str, Any]]) -> None:
+        self._catalog = Catalog(tuple(managers), tuple(marketplaces), version='static')
+
+    async def load(self) -> Catalog:
+        return self._catalog
+
+    async def version(self) -> str | None:
+        return self._catalog.version
+
+
+class FileCatalogProvider(CatalogProvider):
+    """
+    Каталог из локального YAML/JSON файла.
+
+    Формат файла:
+        managers: [{name, phone, telegram}, ...]
+        marketplaces: [{name, url}, ...]
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+
+    async def load(self) -> Catalog:
+        return await asyncio.to_thread(self._load_sync)
+
+    async def version(self) -> str | None:
+        stat = await asyncio.to_thread(os.stat, self._path)
+        return f'{stat.st_mtime_ns}:{stat.st_size}'
+
+    def _load_sync(self) -> Catalog:
+        stat = os.stat(self._path)
+        raw = self._path.read_bytes()
+        if self._path.suffix == '.json':
+            data = orjson.loads(raw)
+        else:
+            data = yaml.safe_load(raw)
+
+        if not isinstance(data, dict):
+            raise ValueError(f'Catalog file {self._path} must contain a mapping')
+
+        return Catalog(
+            managers=tuple(data.get('managers') or ()),
+            marketplaces=tuple(data.get('marketplaces') or ()),
+            version=f'{stat.st_mtime_ns}:{stat.st_size}',
+        )
@@ -0,0 +1,141 @@
+"""
+Реестр экранов приватного чата.
+
+Все тексты и клавиатуры собираются один раз: статические экраны - при
+импорте, экраны со списками менеджеров и маркетплейсов - при изменении
+данных каталога. Обработчики только берут готовый экран из реестра.
+"""
+from dataclasses import dataclass
+from enum import StrEnum
+from pathlib import Path
+from typing import Any, Sequence
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from src.handlers.private.texts import (
+    BACK_TO_CHOICE,
+    CHOOSE_SALE_TYPE,
+    OPT_MANAGERS_HEADER,
+    OPT_QUANTITY_QUESTION,
+    OPT_SMALL_QUANTITY,
+    RETAIL_MARKETPLACES_HEADER,
+    START_GREETING,
+)
+
+
+class ScreenName(StrEnum):
+    START = 'start'
+    RETAIL = 'retail'
+    OPT_QUANTITY = 'opt_quantity'
+    OPT_MANAGERS = 'opt_managers'
+    OPT_SMALL_QUANTITY = 'opt_small_quantity'
+
+
+# Путь к изображению стартового экрана (от src/handlers/private/screens.py к корню проекта)
+START_IMAGE_PATH = Path(__file__).parent.parent.parent.parent / "src" / "templates" / "start" / "main_photo.jpg"
+
+
+@dataclass(frozen=True, slots=True)
+class Screen:
+    text: str
+    reply_markup: InlineKeyboardMarkup
+    photo: Path | None = None
+    disable_web_page_preview: bool | None = None
+
+
+START_KEYBOARD = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [
+            InlineKeyboardButton(text="🛒 Розница", callback_data="sale_type:retail"),
+            InlineKeyboardButton(text="📦 ОПТ", callback_data="sale_type:opt"),
+        ],
+    ]
+)
+
+QUANTITY_KEYBOARD = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [
+            InlineKeyboardButton(text="✅ Да", callback_data="quantity:yes"),
+            InlineKeyboardButton(text="❌ Нет", callback_data="quantity:no"),
+        ],
+        [InlineKeyboardButton(text="🔙 " + BACK_TO_CHOICE, callback_data="back_to_start")],
+    ]
+)
+
+BACK_TO_START_KEYBOARD = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(text="🔙 " + BACK_TO_CHOICE, callback_data="back_to_start")],
+    ]
+)
+
+
+def render_marketplaces(marketplaces: Sequence[dict[str, Any]]) -> str:
+    """Формирует текст со списком маркетплейсов."""
+    items = [
+        f"{i}. {marketplace['name']}\n   {marketplace['url']}\n\n" for i, marketplace in enumerate(marketplaces, 1)
+    ]
+    return RETAIL_MARKETPLACES_HEADER + "".join(items)
+
+
+def render_managers(managers: Sequence[dict[str, Any]]) -> str:
+    """Формирует текст со списком менеджеров."""
+    parts = [OPT_MANAGERS_HEADER]
+    for i, manager in enumerate(managers, 1):
+        parts.append(f"{i}. {manager['name']}\n")
+        if manager.get("phone"):
+            parts.append(f"   📞 {manager['phone']}\n")
+        if manager.get("telegram"):
+            parts.append(f"   💬 {manager['telegram']}\n")
+        parts.append("\n")
+    return "".join(parts)
+
+
+class ScreenRegistry:
+    def __init__(self) -> None:
+        self._screens: dict[ScreenName, Screen] = {
+            ScreenName.START: Screen(
+                f"{START_GREETING}\n\n{CHOOSE_SALE_TYPE}",
+                START_KEYBOARD,
+                photo=START_IMAGE_PATH,
+            ),
+            ScreenName.OPT_QUANTITY: Screen(OPT_QUANTITY_QUESTION, QUANTITY_KEYBOARD),
+            ScreenName.OPT_SMALL_QUANTITY: Screen(OPT_SMALL_QUANTITY, BACK_TO_START_KEYBOARD),
+            ScreenName.RETAIL: Screen(
+                render_marketplaces([]),
+                BACK_TO_START_KEYBOARD,
+                disable_web_page_preview=False,
+            ),
+            ScreenName.OPT_MANAGERS: Screen(render_managers([]), BACK_TO_START_KEYBOARD),
+        }
+        self._catalog: tuple[tuple[dict[str, Any], ...], tuple[dict[str, Any], ...]] | None = None
+
+    def __getitem__(self, name: ScreenName) -> Screen:
+        return self._screens[name]
+
+    def update_catalog(
+        self,
+        managers: Sequence[dict[str, Any]],
+        marketplaces: Sequence[dict[str, Any]],
+    ) -> bool:
+        """
+        Перерисовывает экраны, зависящие от каталога.
+
+        Returns:
+            True, если данные изменились и экраны были перерисованы
+        """
+        # Храним копии, чтобы изменение исходных списков на месте тоже замечалось
+        catalog = (tuple(dict(m) for m in managers), tuple(dict(m) for m in marketplaces))
+        if catalog == self._catalog:
+            return False
+
+        self._screens[ScreenName.RETAIL] = Screen(
+            render_marketplaces(marketplaces),
+            BACK_TO_START_KEYBOARD,
+            disable_web_page_preview=False,
+        )
+        self._screens[ScreenName.OPT_MANAGERS] = Screen(render_managers(managers), BACK_TO_START_KEYBOARD)
+        self._catalog = catalog
+        return True
+
+
+screens = ScreenRegistry()
@@ -0,0 +1,108 @@
+"""
+Переходы между экранами приватного чата.
+
+Экран показывается вместо текущего сообщения самым дешевым способом:
+- фото -> экран с тем же фото: edit_message_caption;
+- фото -> экран с другим фото: edit_message_media по file_id из кеша;
+- фото -> текстовый экран: edit_message_caption (фото остается шапкой),
+  если текст помещается в подпись и экрану не нужны превью ссылок
+  (у подписи их не бывает);
+- текст -> текстовый экран: edit_text.
+Удаление и повторная отправка (два запроса) - только когда правка невозможна:
+текстовое сообщение нельзя превратить в фото, а длинный текст или текст
+с превью ссылок - в подпись.
+"""
+import asyncio
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InputMediaPhoto, Message
+
+from src.handlers.private.screens import Screen
+from src.logger import logger
+from src.utils.media_cache import answer_photo_cached, media_cache
+
+# Максимальная длина подписи к медиа в Telegram
+CAPTION_MAX_LENGTH = 1024
+
+
+async def send_screen(message: Message, screen: Screen) -> Message:
+    """Отправляет экран новым сообщением в чат исходного сообщения."""
+    if screen.photo is not None and screen.photo.exists():
+        return await answer_photo_cached(
+            message,
+            screen.photo,
+            caption=screen.text,
+            reply_markup=screen.reply_markup,
+        )
+
+    return await message.answer(
+        screen.text,
+        reply_markup=screen.reply_markup,
+        disable_web_page_preview=screen.disable_web_page_preview,
+    )
+
+
+async def show_screen(message: Message, screen: Screen) -> None:
+    """Показывает экран на месте текущего сообщения."""
+    try:
+        if await _edit(message, screen):
+            return
+    except TelegramBadRequest as e:
+        if 'message is not modified' in str(e):
+            # Повторное нажатие той же кнопки - экран уже показан
+            return
+        logger.warning('SCREEN EDIT FAILED, RESENDING: chat_id=%s, error=%s', message.chat.id, e)
+
+    await replace_screen(message, screen)
+
+
+async def replace_screen(message: Message, screen: Screen) -> Message:
+    """Удаляет текущее сообщение и отправляет экран новым (оба запроса - параллельно)."""
+    _, sent = await asyncio.gather(_delete(message), send_screen(message, screen))
+    return sent
+
+
+async def _delete(message: Message) -> None:
+    try:
+        await message.delete()
+    except Exception:
+        # Если не удалось удалить (например, сообщение уже удалено), продолжаем
+        pass
+
+
+async def _edit(message: Message, screen: Screen) -> bool:
+    """
+    Правит сообщение под экран одним запросом.
+
+    Returns:
+        False, если правкой обойтись нельзя
+    """
+    photo = screen.photo if screen.photo is not None and screen.photo.exists() else None
+
+    if not message.photo:
+        if photo is not None:
+            return False
+        await message.edit_text(
+            screen.text,
+            reply_markup=screen.reply_markup,
+            disable_web_page_preview=screen.disable_web_page_preview,
+        )
+        return True
+
+    # file_id одного файла в разных сообщениях может отличаться, постоянен только file_unique_id
+    if photo is None or media_cache.unique_id(photo) == message.photo[-1].file_unique_id:
+        if len(screen.text) > CAPTION_MAX_LENGTH:
+            return False
+        if photo is None and screen.disable_web_page_preview is False:
+            # Экрану нужны превью ссылок (маркетплейсы), а у подписи к фото их нет
+            return False
+        await message.edit_caption(caption=screen.text, reply_markup=screen.reply_markup)
+        return True
+
+    edited = await message.edit_media(
+        media=InputMediaPhoto(media=media_cache.input_file(photo), caption=screen.text),
+        reply_markup=screen.reply_markup,
+    )
+    if isinstance(edited, Message):
+        media_cache.remember(photo, edited)
+    return True
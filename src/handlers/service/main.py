@@ -0,0 +1,23 @@
+"""Обработчики служебных обновлений: изменения участников чатов."""
+from aiogram.types import ChatMemberUpdated
+
+from src.handlers.service.router import service_router
+from src.integrations.chat_info import chat_info_cache
+from src.utils.chat_registry import chat_registry
+
+
+@service_router.my_chat_member()
+async def handle_my_chat_member(event: ChatMemberUpdated):
+    """Бота добавили в чат, удалили из него или изменили его права."""
+    # Сбрасываем закешированные данные чата и права бота
+    chat_info_cache.invalidate_chat(event.chat.id)
+    chat_info_cache.invalidate_member(event.chat.id, event.new_chat_member.user.id)
+
+    chat_registry.update(event)
+
+
+
+@service_router.shutdown()
+async def save_chat_registry():
+    """Записывает на диск изменения реестра чатов, которые еще не сохранены."""
+    await chat_registry.close()
@@ -0,0 +1,3 @@
+from aiogram import Router
+
+service_router = Router(name="service")
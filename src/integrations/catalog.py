@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from src.catalog.cache import CatalogCache
+from src.catalog.providers import (
+    MOCK_MANAGERS,
+    MOCK_MARKETPLACES,
+    CatalogProvider,
+    FileCatalogProvider,
+    StaticCatalogProvider,
+)
+
+from conf.config import settings
+
+
+def create_catalog_provider() -> CatalogProvider:
+    if settings.catalog_path:
+        return FileCatalogProvider(Path(settings.catalog_path))
+    return StaticCatalogProvider(MOCK_MANAGERS, MOCK_MARKETPLACES)
+
+
+catalog_cache = CatalogCache(
+    create_catalog_provider(),
+    ttl=settings.catalog_ttl,
+    watch_interval=settings.catalog_watch_interval,
+)
+
+
+def get_catalog_cache() -> CatalogCache:
+    global catalog_cache
+
+    return catalog_cache
@@ -0,0 +1,69 @@
+"""
+Кеш данных о боте и чатах для API проверки прав.
+
+get_me, get_chat и get_chat_member кешируются на время TTL; одновременные
+запросы по одному чату объединяются в один вызов Bot API. Записи чата и
+права бота в нем сбрасываются при получении my_chat_member (см. src/handlers/service).
+Если передан budget, запрос к Bot API при промахе кеша сначала ждет токен из
+него - так фоновые массовые проверки не расходуют больше отведенной частоты.
+"""
+from typing import Awaitable, Callable, TypeVar
+
+from aiogram import Bot
+from aiogram.types import ChatFullInfo, ChatMemberUnion, User
+
+from src.utils.rate_limiter import TokenBucket
+from src.utils.ttl_cache import TTLCache
+
+from conf.config import settings
+
+T = TypeVar('T')
+
+
+class ChatInfoCache:
+    def __init__(self, ttl: float, me_ttl: float) -> None:
+        self._me: TTLCache[User] = TTLCache(ttl=me_ttl, maxsize=1)
+        self._chats: TTLCache[ChatFullInfo] = TTLCache(ttl=ttl)
+        self._members: TTLCache[ChatMemberUnion] = TTLCache(ttl=ttl)
+
+    async def get_me(self, bot: Bot) -> User:
+        return await self._me.get(bot.id, bot.get_me)
+
+    async def get_chat(self, bot: Bot, chat_id: int, budget: TokenBucket | None = None) -> ChatFullInfo:
+        return await self._chats.get(chat_id, lambda: _call(budget, lambda: bot.get_chat(chat_id)))
+
+    async def get_chat_member(
+        self,
+        bot: Bot,
+        chat_id: int,
+        user_id: int,
+        budget: TokenBucket | None = None,
+    ) -> ChatMemberUnion:
+        return await self._members.get(
+            (chat_id, user_id),
+            lambda: _call(budget, lambda: bot.get_chat_member(chat_id, user_id)),
+        )
+
+    def invalidate_chat(self, chat_id: int) -> None:
+        self._chats.invalidate(chat_id)
+
+    def invalidate_member(self, chat_id: int, user_id: int) -> None:
+        self._members.invalidate((chat_id, user_id))
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {'me': self._me.stats(), 'chats': self._chats.stats(), 'members': self._members.stats()}
+
+
+async def _call(budget: TokenBucket | None, request: Callable[[], Awaitable[T]]) -> T:
+    if budget is not None:
+        await budget.wait()
+    return await request()
+
+
+chat_info_cache = ChatInfoCache(ttl=settings.chat_info_ttl, me_ttl=settings.bot_info_ttl)
+
+
+def get_chat_info_cache() -> ChatInfoCache:
+    global chat_info_cache
+
+    return chat_info_cache
@@ -0,0 +1,54 @@
+from src.storage.context import fsm_write_stats
+from src.utils.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+metrics_registry = MetricsRegistry()
+
+webhook_requests = metrics_registry.register(
+    Counter('tg_webhook_requests_total', 'Webhook requests by update type and result', ('update_type', 'result'))
+)
+webhook_accept_seconds = metrics_registry.register(
+    Histogram('tg_webhook_accept_seconds', 'Time to accept a webhook update and answer Telegram')
+)
+update_processing_seconds = metrics_registry.register(
+    Histogram('tg_update_processing_seconds', 'Dispatcher processing time by update type', ('update_type',))
+)
+updates_in_flight = metrics_registry.register(Gauge('tg_updates_in_flight', 'Updates being processed by the dispatcher'))
+handler_calls = metrics_registry.register(
+    Counter('tg_handler_calls_total', 'Handler calls by handler and result', ('handler', 'result'))
+)
+bot_api_request_seconds = metrics_registry.register(
+    Histogram('tg_bot_api_request_seconds', 'Outbound Bot API request time by method, retries included', ('method',))
+)
+bot_api_errors = metrics_registry.register(
+    Counter('tg_bot_api_errors_total', 'Failed outbound Bot API requests by method and error', ('method', 'error'))
+)
+bot_api_retries = metrics_registry.register(Counter('tg_bot_api_retries_total', 'Retried Bot API requests', ('method',)))
+bot_api_in_flight = metrics_registry.register(Gauge('tg_bot_api_in_flight', 'Outbound Bot API requests in progress'))
+
+# Значения ниже читаются из объектов при выдаче /metrics (см. src/integrations/tg_bot.py)
+update_queue_depth = metrics_registry.register(Gauge('tg_update_queue_depth', 'Updates waiting in the webhook queue'))
+update_queue_busy_workers = metrics_registry.register(
+    Gauge('tg_update_queue_busy_workers', 'Webhook queue workers processing an update')
+)
+update_queue_rejected = metrics_registry.register(
+    Counter('tg_update_queue_rejected_total', 'Updates rejected because the webhook queue was full or closed')
+)
+update_queue_dropped = metrics_registry.register(
+    Counter('tg_update_queue_dropped_total', 'Updates dropped from the webhook queue')
+)
+dedup_hits = metrics_registry.register(Counter('tg_dedup_hits_total', 'Duplicate updates dropped by update_id'))
+
+fsm_skipped_writes = metrics_registry.register(
+    Counter('tg_fsm_skipped_writes_total', 'FSM writes skipped because nothing changed')
+)
+fsm_skipped_writes.set_function(lambda: fsm_write_stats.skipped_writes)
+fsm_extra_reads = metrics_registry.register(
+    Counter('tg_fsm_extra_reads_total', 'FSM data reads needed to detect unchanged writes')
+)
+fsm_extra_reads.set_function(lambda: fsm_write_stats.extra_reads)
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    global metrics_registry
+
+    return metrics_registry
@@ -0,0 +1,173 @@
+"""
+HTTP-сессия бота для исходящих запросов к Bot API.
+
+Поверх стандартной AiohttpSession добавляет:
+- пул keep-alive соединений заданного размера;
+- повтор запросов с экспоненциальной задержкой по настройкам retry_* из конфига.
+  Отправка сообщений повторяется только после 429 и ошибок соединения: после
+  таймаута или 5xx Telegram мог уже принять сообщение, и повтор продублирует его;
+- ограничение частоты отправки (глобально и по чатам), чтобы не получать 429.
+  Глобальный лимит Telegram касается только отправки сообщений, поэтому
+  чтение (getChat, getMe и т.п.) им не ограничивается.
+"""
+import time
+import random
+import asyncio
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.exceptions import ClientDecodeError, TelegramAPIError, TelegramNetworkError, TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiohttp import ClientConnectorError
+
+from src.integrations import metrics
+from src.logger import logger
+from src.utils.rate_limiter import TelegramRateLimiter
+
+from conf.config import settings
+
+# Префиксы методов, которые отправляют или меняют сообщения в чате (лимит чата)
+_CHAT_METHOD_PREFIXES = ('send', 'copy', 'forward', 'edit')
+# Префиксы методов, которые отправляют новые сообщения (общий лимит бота)
+_SEND_METHOD_PREFIXES = ('send', 'copy', 'forward')
+
+
+class RetryableResponse(Exception):
+    """Ответ Bot API со статусом из retry_status_codes."""
+
+    def __init__(self, error: Exception, status_code: int) -> None:
+        super().__init__(str(error))
+        self.error = error
+        self.status_code = status_code
+
+
+class TelegramSession(AiohttpSession):
+    def __init__(
+        self,
+        rate_limiter: TelegramRateLimiter | None = None,
+        limit: int = 100,
+        keepalive_timeout: float = 60,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        backoff: float = 2.0,
+        jitter: float = 0.25,
+        retry_status_codes: set[int] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(limit=limit, **kwargs)
+        self._connector_init.update(
+            {
+                'limit_per_host': limit,
+                'keepalive_timeout': keepalive_timeout,
+            }
+        )
+        self._rate_limiter = rate_limiter
+        self._max_retries = max_retries
+        self._base_delay = base_delay
+        self._backoff = backoff
+        self._jitter = jitter
+        self._retry_status_codes = retry_status_codes or set()
+
+    def check_response(
+        self,
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+        status_code: int,
+        content: str,
+    ) -> Response[TelegramType]:
+        try:
+            return super().check_response(bot=bot, method=method, status_code=status_code, content=content)
+        except (TelegramAPIError, ClientDecodeError) as e:
+            # Статус ответа недоступен снаружи, поэтому решение о повторе принимаем здесь
+            if status_code in self._retry_status_codes:
+                raise RetryableResponse(e, status_code) from e
+            raise
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+        timeout: int | None = None,
+    ) -> TelegramType:
+        api_method = method.__api_method__
+        started_at = time.perf_counter()
+        metrics.bot_api_in_flight.inc()
+        try:
+            return await self._make_request(bot, method, timeout)
+        except Exception as e:
+            metrics.bot_api_errors.labels(api_method, type(e).__name__).inc()
+            raise
+        finally:
+            metrics.bot_api_in_flight.dec()
+            metrics.bot_api_request_seconds.labels(api_method).observe(time.perf_counter() - started_at)
+
+    async def _make_request(
+        self,
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+        timeout: int | None,
+    ) -> TelegramType:
+        api_method = method.__api_method__
+        attempt = 0
+        while True:
+            # Каждая попытка, в том числе повтор после 429, проходит через ограничитель
+            if self._rate_limiter is not None and api_method.startswith(_CHAT_METHOD_PREFIXES):
+                await self._rate_limiter.acquire(
+                    getattr(method, 'chat_id', None),
+                    global_limit=api_method.startswith(_SEND_METHOD_PREFIXES),
+                )
+
+            try:
+                return await super().make_request(bot, method, timeout=timeout)
+            except (RetryableResponse, TelegramNetworkError) as e:
+                error = e.error if isinstance(e, RetryableResponse) else e
+                if attempt >= self._max_retries or not self._can_retry(api_method, e):
+                    raise error from None
+
+                delay = self._base_delay * self._backoff**attempt
+                delay *= 1 + random.uniform(-self._jitter, self._jitter)
+                if isinstance(error, TelegramRetryAfter):
+                    delay = max(delay, error.retry_after)
+
+                attempt += 1
+                metrics.bot_api_retries.labels(method.__api_method__).inc()
+                logger.warning(
+                    'BOT API RETRY: method=%s, attempt=%s/%s, delay=%.2f, error=%s',
+                    method.__api_method__,
+                    attempt,
+                    self._max_retries,
+                    delay,
+                    error,
+                )
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _can_retry(api_method: str, error: Exception) -> bool:
+        if not api_method.startswith(_SEND_METHOD_PREFIXES):
+            return True
+        # Отправка не идемпотентна: повторяем, только если Telegram точно не принял запрос
+        if isinstance(error, RetryableResponse):
+            return error.status_code == 429
+        # AiohttpSession заменяет ошибку aiohttp на TelegramNetworkError, исходная остается в __context__
+        return isinstance(error.__context__, ClientConnectorError)
+
+
+def create_session() -> TelegramSession:
+    rate_limiter = TelegramRateLimiter(
+        global_rate=settings.tg_global_rate,
+        private_chat_rate=settings.tg_private_chat_rate,
+        group_chat_rate=settings.tg_group_chat_per_minute / 60,
+        chat_burst=settings.tg_chat_burst,
+    )
+    return TelegramSession(
+        rate_limiter=rate_limiter,
+        limit=settings.tg_pool_size,
+        keepalive_timeout=settings.tg_keepalive_timeout,
+        max_retries=settings.retry_max_retries,
+        base_delay=settings.retry_base_delay,
+        backoff=settings.retry_backoff,
+        jitter=settings.retry_jitter,
+        retry_status_codes=settings.retry_status_codes_set,
+    )
@@ -1,15 +1,92 @@
+import time
+from typing import Any
+
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+from aiogram.types.update import UpdateTypeLookupError
 
+from src.integrations import metrics
+from src.integrations.session import create_session
+from src.logger import logger
 from src.on_startup.dispatcher import setup_dispatcher
+from src.utils.dedup import UpdateDeduplicator
+from src.utils.update_queue import UpdateQueue
 
 from conf.config import settings
 
-bot = Bot(token=settings.BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+bot = Bot(
+    token=settings.BOT_TOKEN,
+    session=create_session(),
+    default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+)
 dp = setup_dispatcher(bot)
 
 
+def _update_type(update: Update) -> str:
+    try:
+        return update.event_type
+    except UpdateTypeLookupError:
+        return 'unknown'
+
+
+async def handle_update(update: Update) -> None:
+    started_at = time.perf_counter()
+    metrics.updates_in_flight.inc()
+    try:
+        response = await dp.feed_update(bot, update)
+        if isinstance(response, TelegramMethod):
+            await dp.silent_call_request(bot, response)
+    finally:
+        duration = time.perf_counter() - started_at
+        update_type = _update_type(update)
+        metrics.updates_in_flight.dec()
+        metrics.update_processing_seconds.labels(update_type).observe(duration)
+        if duration >= settings.slow_update_threshold:
+            logger.warning(
+                'SLOW UPDATE: update_id=%s, update_type=%s, duration=%.3f',
+                update.update_id,
+                update_type,
+                duration,
+            )
+
+
+async def process_update(data: dict[str, Any]) -> None:
+    # Валидация в модели aiogram выполняется один раз, уже в воркере очереди
+    update = Update.model_validate(data, context={'bot': bot})
+    await handle_update(update)
+
+
+update_queue = UpdateQueue(
+    process_update,
+    workers=settings.webhook_workers,
+    maxsize=settings.webhook_queue_size,
+    policy=settings.webhook_overload_policy,
+)
+
+
+def create_deduplicator() -> UpdateDeduplicator:
+    redis = None
+    if settings.dedup_shared:
+        # redis нужен только для общей между репликами дедупликации
+        from redis.asyncio import Redis
+
+        # Короткие таймауты: при недоступном Redis вебхук не должен ждать его дольше ответа Telegram
+        redis = Redis.from_url(settings.redis_url, socket_timeout=1, socket_connect_timeout=1)
+    return UpdateDeduplicator(capacity=settings.dedup_capacity, redis=redis, ttl=settings.dedup_ttl)
+
+
+update_deduplicator = create_deduplicator()
+
+metrics.update_queue_depth.set_function(lambda: update_queue.depth)
+metrics.update_queue_busy_workers.set_function(lambda: update_queue.in_flight)
+metrics.update_queue_rejected.set_function(lambda: update_queue.rejected)
+metrics.update_queue_dropped.set_function(lambda: update_queue.dropped)
+metrics.dedup_hits.set_function(lambda: update_deduplicator.hits)
+
+
 def get_dispatcher() -> Dispatcher:
     global dp
 
@@ -20,3 +97,15 @@ def get_tg_bot() -> Bot:
     global bot
 
     return bot
+
+
+def get_update_queue() -> UpdateQueue:
+    global update_queue
+
+    return update_queue
+
+
+def get_update_deduplicator() -> UpdateDeduplicator:
+    global update_deduplicator
+
+    return update_deduplicator
@@ -1,20 +1,153 @@
+import time
 import logging
 from contextvars import ContextVar
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
 
 import yaml
+import orjson
 
 with open('./conf/logging.conf.yml', 'r') as f:
     LOGGING_CONFIG = yaml.full_load(f)
 
 
+def _get_correlation_id(record: logging.LogRecord) -> str | None:
+    # При записи через очередь correlation_id сохранен в записи: в фоновом потоке контекста нет
+    if hasattr(record, 'correlation_id'):
+        return record.correlation_id
+    return correlation_id_ctx.get(None)
+
+
 class ConsoleFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
-        try:
-            correlation_id = correlation_id_ctx.get()
-            return '[%s] %s' % (correlation_id, super().format(record))
-        except LookupError:
+        correlation_id = _get_correlation_id(record)
+        if correlation_id is None:
             return super().format(record)
+        return '[%s] %s' % (correlation_id, super().format(record))
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'time': datetime.fromtimestamp(record.created, UTC),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'correlation_id': _get_correlation_id(record),
+        }
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return orjson.dumps(payload).decode()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Прореживает частые записи по ключу - началу сообщения до ':' (например, 'WEBHOOK UPDATE RECEIVED').
+
+    Правило ключа: {'every': N} - пропускать каждую N-ю запись, {'per_second': N} - не больше N записей в секунду.
+    Записи уровня WARNING и выше (ошибки, медленные обновления) пропускаются всегда. Раз в summary_interval
+    секунд пишется сводка, сколько записей по каждому ключу было отброшено.
+    """
+
+    def __init__(self, rules: dict[str, dict[str, int]] | None = None, summary_interval: float = 60) -> None:
+        super().__init__()
+        self._every = {key: rule['every'] for key, rule in (rules or {}).items() if 'every' in rule}
+        self._per_second = {key: rule['per_second'] for key, rule in (rules or {}).items() if 'per_second' in rule}
+        self._summary_interval = summary_interval
+        self._counters: dict[str, int] = {}
+        self._windows: dict[str, float] = {}
+        self._suppressed: dict[str, int] = {}
+        self._summary_at = time.monotonic() + summary_interval
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not isinstance(record.msg, str):
+            return True
+
+        key = record.msg.partition(':')[0]
+        if key in self._every:
+            keep = self._keep_every(key, self._every[key])
+        elif key in self._per_second:
+            keep = self._keep_per_second(key, self._per_second[key])
+        else:
+            return True
+
+        if not keep:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+        if self._suppressed and time.monotonic() >= self._summary_at:
+            self._write_summary(record.name)
+        return keep
+
+    def _keep_every(self, key: str, every: int) -> bool:
+        count = self._counters.get(key, 0)
+        self._counters[key] = count + 1
+        return count % every == 0
+
+    def _keep_per_second(self, key: str, limit: int) -> bool:
+        now = time.monotonic()
+        if now - self._windows.get(key, 0.0) >= 1:
+            self._windows[key] = now
+            self._counters[key] = 0
+        count = self._counters.get(key, 0)
+        self._counters[key] = count + 1
+        return count < limit
+
+    def _write_summary(self, name: str) -> None:
+        suppressed, self._suppressed = self._suppressed, {}
+        self._summary_at = time.monotonic() + self._summary_interval
+        logging.getLogger(name).info(
+            'LOG SAMPLING SUMMARY: interval=%ss, suppressed=%s',
+            self._summary_interval,
+            suppressed,
+        )
+
+
+class AsyncQueueHandler(QueueHandler):
+    """Только ставит запись в очередь; форматирование и вывод выполняет поток QueueListener."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.correlation_id = correlation_id_ctx.get(None)
+        # Аргументы подставляются сразу: объекты из args могут измениться до записи
+        record.msg = record.getMessage()
+        record.args = None
+        return record
 
 
 correlation_id_ctx: ContextVar[str] = ContextVar('correlation_id_ctx')
 logger = logging.getLogger('tinder_bot')
+
+log_queue: SimpleQueue[logging.LogRecord] = SimpleQueue()
+log_listener: QueueListener | None = None
+
+
+def start_log_listener() -> None:
+    """Переносит обработчики root-логгера в фоновый поток, в event loop остается только постановка в очередь."""
+    global log_listener
+
+    stop_log_listener()
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(AsyncQueueHandler(log_queue))
+
+    log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    log_listener.start()
+
+
+def stop_log_listener() -> None:
+    """Дописывает накопленные в очереди записи и возвращает обработчики root-логгеру."""
+    global log_listener
+
+    if log_listener is None:
+        return
+
+    log_listener.stop()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, AsyncQueueHandler):
+            root.removeHandler(handler)
+    for handler in log_listener.handlers:
+        handler.flush()
+        root.addHandler(handler)
+    log_listener = None
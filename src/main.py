@@ -1,4 +1,3 @@
-import asyncio
 import logging
 from contextlib import asynccontextmanager
 from typing import AsyncIterator
@@ -6,12 +5,16 @@ from typing import AsyncIterator
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from src.api.metrics.router import metrics_router
 from src.api.tg.router import tg_router
-from src.integrations.tg_bot import bot
+from src.integrations.catalog import catalog_cache
+from src.integrations.tg_bot import bot, dp, update_deduplicator, update_queue
 from src.middleware.logger import LogServerMiddleware
+from src.on_shutdown.logger import stop_logger
+from src.on_shutdown.updates import drain_updates
+from src.on_startup.catalog import setup_catalog
 from src.on_startup.logger import setup_logger
 from src.on_startup.webhook import setup_webhook
-from src.utils.background_tasks import tg_background_tasks
 
 
 def setup_middleware(app: FastAPI) -> None:
@@ -31,23 +34,30 @@ def setup_middleware(app: FastAPI) -> None:
 
 def setup_routers(app: FastAPI) -> None:
     app.include_router(tg_router)
+    app.include_router(metrics_router)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     print('START APP')
-    await setup_webhook(bot)
+    await setup_webhook(bot, dp)
     setup_logger()
+    await setup_catalog()
+    update_queue.start()
 
     yield
 
     logging.info('Stopping')
 
-    while len(tg_background_tasks) > 0:
-        logging.info('%s tasks left', len(tg_background_tasks))
-        await asyncio.sleep(0)
+    await drain_updates(update_queue)
+    await catalog_cache.stop()
+    # Закрывает FSM-хранилище (и сбрасывает буфер записи)
+    await dp.emit_shutdown(bot=bot)
+    await bot.session.close()
+    await update_deduplicator.close()
 
     logging.info('Stopped')
+    stop_logger()
 
 
 def create_app() -> FastAPI:
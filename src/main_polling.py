@@ -1,10 +1,18 @@
+import signal
 import asyncio
+from pathlib import Path
 
 from aiogram.types import BotCommand
 
-from src.integrations.tg_bot import get_dispatcher, get_tg_bot
+from src.integrations.catalog import catalog_cache
+from src.integrations.tg_bot import get_dispatcher, get_tg_bot, handle_update
 from src.logger import logger
+from src.on_shutdown.logger import stop_logger
+from src.on_startup.catalog import setup_catalog
 from src.on_startup.logger import setup_logger
+from src.utils.polling import BatchPollingRunner
+
+from conf.config import settings
 
 
 async def start_polling() -> None:
@@ -20,7 +28,52 @@ async def start_polling() -> None:
     logger.info('Deleted webhook')
 
     setup_logger()
-    await dp.start_polling(bot)
+    await setup_catalog()
+
+    runner = BatchPollingRunner(
+        bot,
+        handle_update,
+        offset_path=Path(settings.polling_offset_path),
+        limit=settings.polling_limit,
+        timeout=settings.polling_timeout,
+        concurrency=settings.polling_concurrency,
+        # Получаем только те типы обновлений, для которых есть обработчики
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+
+    stopping = asyncio.Event()
+
+    def stop() -> None:
+        runner.stop()
+        stopping.set()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop)
+
+    await dp.emit_startup(bot=bot)
+    run_task = asyncio.create_task(runner.run())
+    stop_task = asyncio.create_task(stopping.wait())
+    try:
+        await asyncio.wait((run_task, stop_task), return_when=asyncio.FIRST_COMPLETED)
+        if not run_task.done():
+            # Текущая пачка дорабатывается не дольше SHUTDOWN_DRAIN_TIMEOUT;
+            # offset недоработанной пачки не сохраняется, и Telegram отдаст ее повторно
+            done, _ = await asyncio.wait((run_task,), timeout=settings.shutdown_drain_timeout)
+            if not done:
+                logger.warning('POLLING DRAIN TIMEOUT: timeout=%s, batch will be redelivered', settings.shutdown_drain_timeout)
+                run_task.cancel()
+        try:
+            await run_task
+        except asyncio.CancelledError:
+            if not run_task.cancelled():
+                raise
+    finally:
+        stop_task.cancel()
+        await catalog_cache.stop()
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+        stop_logger()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import CallbackQuery, TelegramObject
+
+from src.logger import logger
+
+
+class EarlyCallbackAnswerMiddleware(BaseMiddleware):
+    """
+    Отвечает на callback-запрос сразу, параллельно с обработчиком.
+
+    Индикатор загрузки на кнопке пропадает, не дожидаясь правки и отправки
+    сообщений. Обработчикам не нужно вызывать callback.answer().
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, CallbackQuery):
+            return await handler(event, data)
+
+        answer = asyncio.create_task(self._answer(event))
+        try:
+            return await handler(event, data)
+        finally:
+            await answer
+
+    @staticmethod
+    async def _answer(event: CallbackQuery) -> None:
+        # event.answer() возвращает метод Bot API (awaitable, но не корутину), create_task его не принимает
+        try:
+            await event.answer()
+        except TelegramAPIError as e:
+            logger.warning('CALLBACK ANSWER FAILED: callback_id=%s, error=%s', event.id, e)
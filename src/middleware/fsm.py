@@ -0,0 +1,23 @@
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.fsm.context import FSMContext
+from aiogram.types import TelegramObject
+
+from src.storage.context import TrackedFSMContext
+
+
+class TrackedFSMContextMiddleware(BaseMiddleware):
+    """Подменяет FSMContext на TrackedFSMContext, чтобы пропускать пустые записи в хранилище."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        state = data.get('state')
+        if isinstance(state, FSMContext) and not isinstance(state, TrackedFSMContext):
+            data['state'] = TrackedFSMContext(state.storage, state.key, data.get('raw_state'))
+
+        return await handler(event, data)
@@ -0,0 +1,28 @@
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import TelegramObject
+
+from src.integrations.metrics import handler_calls
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Считает вызовы обработчиков по имени функции и результату."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        handler_object = data.get('handler')
+        name = getattr(getattr(handler_object, 'callback', None), '__name__', 'unknown')
+        try:
+            result = await handler(event, data)
+        except Exception:
+            handler_calls.labels(name, 'error').inc()
+            raise
+
+        handler_calls.labels(name, 'unhandled' if result is UNHANDLED else 'ok').inc()
+        return result
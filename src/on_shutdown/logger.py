@@ -0,0 +1,6 @@
+from src.logger import stop_log_listener
+
+
+def stop_logger() -> None:
+    """Дописывает логи из очереди, чтобы последние записи не потерялись при остановке."""
+    stop_log_listener()
@@ -0,0 +1,25 @@
+from src.logger import logger
+from src.utils.update_queue import DrainReport, UpdateQueue
+
+from conf.config import settings
+
+
+async def drain_updates(update_queue: UpdateQueue) -> DrainReport:
+    """Перестает принимать обновления и дожидается обработки принятых не дольше SHUTDOWN_DRAIN_TIMEOUT."""
+    update_queue.close()
+    logger.info(
+        'UPDATE QUEUE DRAINING: depth=%s, in_flight=%s, timeout=%s',
+        update_queue.depth,
+        update_queue.in_flight,
+        settings.shutdown_drain_timeout,
+    )
+
+    report = await update_queue.drain(settings.shutdown_drain_timeout)
+    if not report.clean:
+        logger.warning(
+            'UPDATE QUEUE DRAIN INCOMPLETE: dropped=%s, cancelled=%s, duration=%.2f',
+            report.dropped,
+            report.cancelled,
+            report.duration,
+        )
+    return report
@@ -0,0 +1,13 @@
+from src.catalog.providers import Catalog
+from src.handlers.private.screens import screens
+from src.integrations.catalog import catalog_cache
+
+
+def _update_screens(catalog: Catalog) -> None:
+    screens.update_catalog(catalog.managers, catalog.marketplaces)
+
+
+async def setup_catalog() -> None:
+    catalog_cache.subscribe(_update_screens)
+    await catalog_cache.refresh(force=True)
+    catalog_cache.start()
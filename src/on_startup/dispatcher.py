@@ -1,22 +1,73 @@
 # src/on_startup/dispatcher.py
+from pathlib import Path
+
+import orjson
 from aiogram import Bot, Dispatcher
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from src.handlers.private.router import private_router
 from src.handlers.private import main as private_main  # noqa: F401 - импортируем для регистрации handlers
+from src.handlers.private.router import private_router
+from src.handlers.service import main as service_main  # noqa: F401 - импортируем для регистрации handlers
+from src.handlers.service.router import service_router
+from src.middleware.callback_answer import EarlyCallbackAnswerMiddleware
+from src.middleware.fsm import TrackedFSMContextMiddleware
 from src.middleware.logger import LogMessageMiddleware
+from src.middleware.metrics import HandlerMetricsMiddleware
+from src.storage.sqlite import SQLiteStorage
+
+from conf.config import settings
+
+
+def create_storage() -> BaseStorage:
+    """Создает FSM-хранилище по настройке FSM_STORAGE: memory | redis | sqlite."""
+    if settings.fsm_storage == 'redis':
+        # redis нужен только для этого бэкенда
+        from aiogram.fsm.storage.redis import RedisStorage
+
+        return RedisStorage.from_url(
+            settings.redis_url,
+            connection_kwargs={
+                'max_connections': settings.fsm_pool_size,
+                'socket_keepalive': True,
+                'health_check_interval': 30,
+            },
+            state_ttl=settings.fsm_state_ttl,
+            data_ttl=settings.fsm_state_ttl,
+            json_loads=orjson.loads,
+            json_dumps=lambda data: orjson.dumps(data).decode(),
+        )
+
+    if settings.fsm_storage == 'sqlite':
+        Path(settings.fsm_sqlite_path).parent.mkdir(parents=True, exist_ok=True)
+        return SQLiteStorage(
+            settings.fsm_sqlite_path,
+            pool_size=settings.fsm_pool_size,
+            ttl=settings.fsm_state_ttl,
+            flush_interval=settings.fsm_flush_interval,
+        )
+
+    return MemoryStorage()
 
 
 def setup_dispatcher(bot: Bot) -> Dispatcher:
-    storage = MemoryStorage()
-    # TODO //storage = RedisStorage(redis)
+    storage = create_storage()
     dp = Dispatcher(storage=storage, bot=bot)
 
-    dp.include_routers(private_router)
+    dp.include_routers(private_router, service_router)
 
     dp.message.middleware(LogMessageMiddleware())
     dp.callback_query.middleware(LogMessageMiddleware())
     dp.edited_message.middleware(LogMessageMiddleware())
     dp.my_chat_member.middleware(LogMessageMiddleware())
 
+    dp.callback_query.outer_middleware(EarlyCallbackAnswerMiddleware())
+
+    dp.message.middleware(TrackedFSMContextMiddleware())
+    dp.callback_query.middleware(TrackedFSMContextMiddleware())
+
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.callback_query.middleware(HandlerMetricsMiddleware())
+    dp.my_chat_member.middleware(HandlerMetricsMiddleware())
+
     return dp
@@ -1,12 +1,17 @@
+import copy
 import logging.config
 
-from src.logger import LOGGING_CONFIG, logger
+from src.logger import LOGGING_CONFIG, logger, start_log_listener
 
 from conf.config import settings
 
 
 def setup_logger() -> None:
-    logging.config.dictConfig(LOGGING_CONFIG)
+    config = copy.deepcopy(LOGGING_CONFIG)
+    config['handlers']['console']['formatter'] = settings.log_format
+    logging.config.dictConfig(config)
 
     if settings.LOG_LEVEL == 'debug':
         logger.setLevel(logging.DEBUG)
+
+    start_log_listener()
@@ -1,11 +1,20 @@
 import logging
 
-from aiogram import Bot
+from aiogram import Bot, Dispatcher
 
 from conf.config import settings
 
+# Telegram допускает от 1 до 100 одновременных соединений вебхука
+MAX_WEBHOOK_CONNECTIONS = 100
 
-async def setup_webhook(bot: Bot) -> None:
+
+def get_webhook_max_connections() -> int:
+    # Больше соединений, чем воркеров очереди, не ускорит обработку
+    max_connections = settings.webhook_max_connections or settings.webhook_workers
+    return max(1, min(MAX_WEBHOOK_CONNECTIONS, max_connections))
+
+
+async def setup_webhook(bot: Bot, dp: Dispatcher) -> None:
     logging.info("Setup webhook")
     print("Setup webhook")
 
@@ -14,14 +23,29 @@ async def setup_webhook(bot: Bot) -> None:
         print("WEBHOOK_URL is not set, skipping webhook setup")
         return
 
+    # Получаем только те типы обновлений, для которых есть обработчики
+    allowed_updates = dp.resolve_used_update_types()
+    max_connections = get_webhook_max_connections()
+
     webhook = await bot.get_webhook_info()
-    if webhook.url != settings.WEBHOOK_URL:
-        print("Delete webhook")
-        await bot.delete_webhook()
+    if (
+        webhook.url == settings.WEBHOOK_URL
+        and set(webhook.allowed_updates or ()) == set(allowed_updates)
+        and webhook.max_connections == max_connections
+        and not settings.webhook_drop_pending_updates
+    ):
+        logging.info("Webhook is up to date, skipping registration")
+        print("Webhook is up to date, skipping registration")
+        return
 
-    logging.info("Set webhook")
+    logging.info("Set webhook: allowed_updates=%s, max_connections=%s", allowed_updates, max_connections)
     print("Set webhook")
-    await bot.set_webhook(settings.WEBHOOK_URL)
+    await bot.set_webhook(
+        settings.WEBHOOK_URL,
+        allowed_updates=allowed_updates,
+        max_connections=max_connections,
+        drop_pending_updates=settings.webhook_drop_pending_updates,
+    )
 
     logging.info("Finish setup")
     print("Finish setup")
@@ -0,0 +1,79 @@
+"""
+FSMContext, который не ходит в хранилище без необходимости.
+
+Текущее состояние уже прочитано FSMContextMiddleware (raw_state), данные
+читаются лениво один раз за обновление. Запись выполняется только если
+значение действительно изменилось.
+"""
+from dataclasses import dataclass
+from typing import Any, Mapping
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+
+@dataclass(slots=True)
+class FSMWriteStats:
+    skipped_writes: int = 0
+    extra_reads: int = 0
+
+    @property
+    def saved_round_trips(self) -> int:
+        return self.skipped_writes - self.extra_reads
+
+
+fsm_write_stats = FSMWriteStats()
+
+
+class TrackedFSMContext(FSMContext):
+    def __init__(self, storage: BaseStorage, key: StorageKey, state: str | None) -> None:
+        super().__init__(storage=storage, key=key)
+        self._state = state
+        self._data: dict[str, Any] | None = None
+
+    async def get_state(self) -> str | None:
+        return self._state
+
+    async def set_state(self, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        if value == self._state:
+            fsm_write_stats.skipped_writes += 1
+            return
+
+        await super().set_state(value)
+        self._state = value
+
+    async def get_data(self) -> dict[str, Any]:
+        if self._data is None:
+            self._data = await super().get_data()
+        return self._data.copy()
+
+    async def set_data(self, data: Mapping[str, Any]) -> None:
+        if self._data is not None and data == self._data:
+            fsm_write_stats.skipped_writes += 1
+            return
+
+        await super().set_data(data)
+        self._data = dict(data)
+
+    async def get_value(self, key: str, default: Any | None = None) -> Any | None:
+        data = await self.get_data()
+        return data.get(key, default)
+
+    async def update_data(self, data: Mapping[str, Any] | None = None, **kwargs: Any) -> dict[str, Any]:
+        if data:
+            kwargs.update(data)
+        current = await self.get_data()
+        current.update(kwargs)
+        await self.set_data(current)
+        return current.copy()
+
+    async def clear(self) -> None:
+        if self._state is None and self._data is None:
+            # Одно чтение вместо двух записей: если данных нет, чистить нечего
+            fsm_write_stats.extra_reads += 1
+            await self.get_data()
+
+        await self.set_state(None)
+        await self.set_data({})
@@ -0,0 +1,211 @@
+"""
+FSM-хранилище на SQLite для однонодовых инсталляций.
+
+Запись буферизуется в памяти и сбрасывается в базу одной транзакцией раз в
+flush_interval секунд или при накоплении batch_size изменений. Чтение сначала
+смотрит в буфер, поэтому изменения видны сразу. Запросы выполняются в пуле
+потоков, у каждого потока свое соединение (в режиме WAL чтение не блокируется
+записью). Состояние пользователей, не менявшееся дольше ttl секунд, удаляется.
+"""
+import time
+import asyncio
+import sqlite3
+import threading
+from asyncio import Task
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Mapping, TypeVar
+
+import orjson
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from src.logger import logger
+
+T = TypeVar('T')
+
+# Маркер "поле не менялось" в буфере записи
+_UNSET: Any = object()
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS fsm (
+    key TEXT PRIMARY KEY,
+    state TEXT,
+    data BLOB,
+    updated_at REAL NOT NULL
+)
+'''
+_UPSERT_STATE = '''
+INSERT INTO fsm (key, state, updated_at) VALUES (?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at
+'''
+_UPSERT_DATA = '''
+INSERT INTO fsm (key, data, updated_at) VALUES (?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+'''
+_DELETE_EMPTY = 'DELETE FROM fsm WHERE key = ? AND state IS NULL AND data IS NULL'
+
+
+class SQLiteStorage(BaseStorage):
+    def __init__(
+        self,
+        path: str,
+        pool_size: int = 4,
+        ttl: float | None = None,
+        flush_interval: float = 0.5,
+        batch_size: int = 100,
+        key_builder: KeyBuilder | None = None,
+    ) -> None:
+        self._path = path
+        self._ttl = ttl
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=max(1, pool_size), thread_name_prefix='fsm-sqlite')
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        # ключ -> [state, data]; _UNSET означает, что поле не менялось
+        self._pending: dict[str, list[Any]] = {}
+        # батч, который прямо сейчас пишется в базу
+        self._flushing: dict[str, list[Any]] = {}
+        self._flush_task: Task[None] | None = None
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._closing = False
+        self._last_purge = 0.0
+
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+            conn.execute('CREATE INDEX IF NOT EXISTS fsm_updated_at ON fsm (updated_at)')
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        self._buffer(self._key_builder.build(key), 0, value)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        storage_key = self._key_builder.build(key)
+        value = self._buffered(storage_key, 0)
+        if value is _UNSET:
+            value = await self._run(self._select, storage_key, 'state')
+        return value
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            msg = f'Data must be a dict or dict-like object, got {type(data).__name__}'
+            raise DataNotDictLikeError(msg)
+
+        self._buffer(self._key_builder.build(key), 1, orjson.dumps(data) if data else None)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        storage_key = self._key_builder.build(key)
+        raw = self._buffered(storage_key, 1)
+        if raw is _UNSET:
+            raw = await self._run(self._select, storage_key, 'data')
+        return orjson.loads(raw) if raw else {}
+
+    async def flush(self) -> None:
+        """Сбрасывает буфер записи в базу одной транзакцией."""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+
+            batch = self._flushing = self._pending
+            self._pending = {}
+            try:
+                await self._run(self._write_batch, batch)
+            except Exception as e:
+                # Возвращаем неудачный батч в буфер, не затирая более свежие изменения
+                for storage_key, values in batch.items():
+                    pending = self._pending.setdefault(storage_key, [_UNSET, _UNSET])
+                    for i, value in enumerate(values):
+                        if pending[i] is _UNSET:
+                            pending[i] = value
+                logger.error('FSM SQLITE FLUSH FAILED: keys=%s, error=%s', len(batch), e)
+            finally:
+                self._flushing = {}
+
+    async def close(self) -> None:
+        # Цикл не отменяем: отмена не останавливает запись в потоке, а ее батч не вернется в буфер
+        self._closing = True
+        if self._flush_task is not None:
+            self._flush_requested.set()
+            await self._flush_task
+            self._flush_task = None
+
+        await self.flush()
+
+        # Соединения закрываются только после того, как потоки пула закончили работу с ними
+        self._executor.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    def _buffer(self, storage_key: str, field: int, value: Any) -> None:
+        pending = self._pending.setdefault(storage_key, [_UNSET, _UNSET])
+        pending[field] = value
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop(), name='fsm-sqlite-flush')
+        if len(self._pending) >= self._batch_size:
+            self._flush_requested.set()
+
+    def _buffered(self, storage_key: str, field: int) -> Any:
+        for buffer in (self._pending, self._flushing):
+            values = buffer.get(storage_key)
+            if values is not None and values[field] is not _UNSET:
+                return values[field]
+        return _UNSET
+
+    async def _flush_loop(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), self._flush_interval)
+            except TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _select(self, storage_key: str, column: str) -> Any:
+        query = f'SELECT {column} FROM fsm WHERE key = ?'
+        params: tuple[Any, ...] = (storage_key,)
+        if self._ttl is not None:
+            query += ' AND updated_at >= ?'
+            params += (time.time() - self._ttl,)
+
+        row = self._connect().execute(query, params).fetchone()
+        return row[0] if row else None
+
+    def _write_batch(self, batch: dict[str, list[Any]]) -> None:
+        now = time.time()
+        states = [(k, v[0], now) for k, v in batch.items() if v[0] is not _UNSET]
+        data = [(k, v[1], now) for k, v in batch.items() if v[1] is not _UNSET]
+
+        conn = self._connect()
+        with conn:
+            conn.executemany(_UPSERT_STATE, states)
+            conn.executemany(_UPSERT_DATA, data)
+            conn.executemany(_DELETE_EMPTY, [(k,) for k in batch])
+
+            # Удаляем состояние пользователей, неактивных дольше ttl
+            if self._ttl is not None and now - self._last_purge >= self._ttl / 10:
+                conn.execute('DELETE FROM fsm WHERE updated_at < ?', (now - self._ttl,))
+                self._last_purge = now
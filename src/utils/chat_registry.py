@@ -0,0 +1,146 @@
+"""
+Реестр чатов, в которых состоит бот, и его прав в них.
+
+Реестр обновляется по обновлениям my_chat_member (бота добавили, удалили,
+изменили права) и сохраняется на диск, поэтому после перезапуска известные
+чаты не теряются. Запись выполняется в отдельном потоке не чаще раза в
+save_delay секунд: несколько обновлений подряд сохраняются одной записью.
+Проверка прав по известному чату не требует запросов к Bot API.
+"""
+import os
+import asyncio
+from asyncio import Task
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import orjson
+from aiogram.types import Chat, ChatMemberUnion, ChatMemberUpdated
+from pydantic import TypeAdapter
+
+from src.logger import logger
+
+from conf.config import settings
+
+_chat_member_adapter: TypeAdapter[ChatMemberUnion] = TypeAdapter(ChatMemberUnion)
+
+
+@dataclass(slots=True)
+class ChatRecord:
+    chat: Chat
+    member: ChatMemberUnion
+    date: datetime
+
+
+class ChatRegistry:
+    def __init__(self, path: Path, save_delay: float = 1.0) -> None:
+        self._path = path
+        self._save_delay = save_delay
+        self._chats: dict[int, ChatRecord] = self._load()
+        self._dirty = False
+        self._save_task: Task[None] | None = None
+        self._save_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._chats)
+
+    def get(self, chat_id: int) -> ChatRecord | None:
+        return self._chats.get(chat_id)
+
+    def update(self, event: ChatMemberUpdated) -> bool:
+        """
+        Запоминает текущий статус бота в чате из my_chat_member.
+
+        Returns:
+            False, если обновление старее уже известного (пришло не по порядку)
+        """
+        known = self._chats.get(event.chat.id)
+        if known is not None and known.date > event.date:
+            return False
+
+        self._chats[event.chat.id] = ChatRecord(chat=event.chat, member=event.new_chat_member, date=event.date)
+        self._dirty = True
+        if self._save_task is None:
+            self._save_task = asyncio.create_task(self._save_later())
+        logger.info(
+            'CHAT REGISTRY UPDATED: chat_id=%s, chat_type=%s, status=%s',
+            event.chat.id,
+            event.chat.type,
+            event.new_chat_member.status,
+        )
+        return True
+
+    async def flush(self) -> None:
+        """Записывает реестр на диск, если он изменился."""
+        async with self._save_lock:
+            if not self._dirty:
+                return
+            records = list(self._chats.items())
+            self._dirty = False
+            try:
+                await asyncio.to_thread(self._save, records)
+            except Exception as e:
+                # Реестр остается несохраненным до следующей записи
+                self._dirty = True
+                logger.warning('Failed to save chat registry %s: %s', self._path, e)
+
+    async def close(self) -> None:
+        """Отменяет отложенную запись и сохраняет несохраненные изменения."""
+        if self._save_task is not None:
+            self._save_task.cancel()
+            self._save_task = None
+        # Начатая запись не отменяется, flush() дождется ее под блокировкой
+        await self.flush()
+
+    async def _save_later(self) -> None:
+        try:
+            await asyncio.sleep(self._save_delay)
+            # Отмена не должна прерывать запись, уже переданную в поток
+            await asyncio.shield(self.flush())
+        finally:
+            if self._save_task is asyncio.current_task():
+                self._save_task = None
+
+    def _load(self) -> dict[int, ChatRecord]:
+        try:
+            raw = orjson.loads(self._path.read_bytes())
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning('Failed to load chat registry %s: %s', self._path, e)
+            return {}
+
+        chats: dict[int, ChatRecord] = {}
+        for chat_id, item in raw.items():
+            try:
+                chats[int(chat_id)] = ChatRecord(
+                    chat=Chat.model_validate(item['chat']),
+                    member=_chat_member_adapter.validate_python(item['member']),
+                    date=datetime.fromisoformat(item['date']),
+                )
+            except Exception as e:
+                logger.warning('Failed to load chat registry record chat_id=%s: %s', chat_id, e)
+        return chats
+
+    def _save(self, records: list[tuple[int, ChatRecord]]) -> None:
+        data = {
+            str(chat_id): {
+                'chat': record.chat.model_dump(mode='json', exclude_none=True),
+                'member': record.member.model_dump(mode='json', exclude_none=True),
+                'date': record.date.isoformat(),
+            }
+            for chat_id, record in records
+        }
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_suffix('.tmp')
+        tmp_path.write_bytes(orjson.dumps(data))
+        os.replace(tmp_path, self._path)
+
+
+chat_registry = ChatRegistry(Path(settings.chat_registry_path))
+
+
+def get_chat_registry() -> ChatRegistry:
+    global chat_registry
+
+    return chat_registry
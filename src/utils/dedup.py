@@ -0,0 +1,86 @@
+"""
+Дедупликация обновлений Telegram по update_id.
+
+Telegram повторяет обновление, если вебхук ответил медленно или с ошибкой.
+Последние update_id хранятся в кольцевом буфере фиксированного размера;
+при нескольких репликах можно дополнительно использовать общий Redis
+(SET NX с TTL), чтобы повтор, пришедший на другую реплику, тоже отсеивался.
+Если Redis недоступен, дедупликация продолжает работать по локальному буферу.
+"""
+from collections import deque
+from typing import Any
+
+from src.logger import logger
+
+
+class UpdateDeduplicator:
+    def __init__(self, capacity: int = 10000, redis: Any | None = None, ttl: int = 3600) -> None:
+        self._capacity = capacity
+        self._ring: deque[int] = deque()
+        self._seen: set[int] = set()
+        self._redis = redis
+        self._ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.shared_errors = 0
+
+    async def check_and_add(self, update_id: int) -> bool:
+        """
+        Запоминает update_id.
+
+        Returns:
+            True, если обновление новое; False - если это повтор
+        """
+        if update_id in self._seen:
+            self.hits += 1
+            return False
+
+        if self._redis is not None:
+            try:
+                is_new = await self._redis.set(f'tg:update:{update_id}', 1, nx=True, ex=self._ttl)
+            except Exception as e:
+                # Общее хранилище недоступно - проверяем только локальный буфер, а не роняем вебхук
+                self.shared_errors += 1
+                logger.warning('DEDUP SHARED STORE FAILED: update_id=%s, error=%s', update_id, e)
+                is_new = True
+            if not is_new:
+                self.hits += 1
+                self._remember(update_id)
+                return False
+
+        self.misses += 1
+        self._remember(update_id)
+        return True
+
+    async def forget(self, update_id: int) -> None:
+        """Забывает update_id, например если обновление не удалось поставить в очередь."""
+        if update_id in self._seen:
+            self._seen.discard(update_id)
+            self._ring.remove(update_id)
+        if self._redis is not None:
+            try:
+                await self._redis.delete(f'tg:update:{update_id}')
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning('DEDUP SHARED STORE FAILED: update_id=%s, error=%s', update_id, e)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'shared_errors': self.shared_errors,
+            'size': len(self._seen),
+            'capacity': self._capacity,
+        }
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose(close_connection_pool=True)
+
+    def _remember(self, update_id: int) -> None:
+        if update_id in self._seen:
+            return
+        self._seen.add(update_id)
+        self._ring.append(update_id)
+        while len(self._ring) > self._capacity:
+            self._seen.discard(self._ring.popleft())
@@ -0,0 +1,122 @@
+"""
+Кеш file_id для медиа-шаблонов бота.
+
+Каждый файл загружается в Telegram один раз, после чего отправляется по
+file_id. Ключ кеша - sha256 содержимого файла, поэтому замена картинки
+автоматически приводит к повторной загрузке. Кеш сохраняется на диск и
+переживает перезапуски. Вместе с file_id хранится file_unique_id: только он
+постоянен для одного файла и годится для сравнения с фото в сообщении.
+"""
+import os
+import hashlib
+from pathlib import Path
+from typing import Any
+
+import orjson
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from src.logger import logger
+
+from conf.config import settings
+
+
+class MediaCache:
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        # sha256 содержимого -> (file_id, file_unique_id)
+        self._files: dict[str, tuple[str, str | None]] = self._load()
+        # путь -> (mtime_ns, size, sha256), чтобы не перечитывать файл на каждый запрос
+        self._digests: dict[Path, tuple[int, int, str]] = {}
+
+    def digest(self, asset: Path) -> str:
+        stat = asset.stat()
+        cached = self._digests.get(asset)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+        digest = hashlib.sha256(asset.read_bytes()).hexdigest()
+        self._digests[asset] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def get(self, asset: Path) -> str | None:
+        cached = self._files.get(self.digest(asset))
+        return cached[0] if cached is not None else None
+
+    def unique_id(self, asset: Path) -> str | None:
+        """file_unique_id загруженного файла - для проверки, то же ли фото в сообщении."""
+        cached = self._files.get(self.digest(asset))
+        return cached[1] if cached is not None else None
+
+    def input_file(self, asset: Path) -> str | FSInputFile:
+        """Возвращает file_id, если файл уже загружен, иначе файл для загрузки."""
+        return self.get(asset) or FSInputFile(asset)
+
+    def remember(self, asset: Path, message: Message) -> None:
+        """Запоминает file_id фото из отправленного сообщения."""
+        if not message.photo:
+            return
+
+        digest = self.digest(asset)
+        photo = message.photo[-1]
+        if self._files.get(digest) == (photo.file_id, photo.file_unique_id):
+            return
+
+        self._files[digest] = (photo.file_id, photo.file_unique_id)
+        self._save()
+        logger.info('MEDIA CACHE STORED: asset=%s, digest=%s', asset.name, digest[:12])
+
+    def forget(self, asset: Path) -> None:
+        if self._files.pop(self.digest(asset), None) is not None:
+            self._save()
+
+    def _load(self) -> dict[str, tuple[str, str | None]]:
+        try:
+            raw = orjson.loads(self._path.read_bytes())
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning('Failed to load media cache %s: %s', self._path, e)
+            return {}
+
+        files: dict[str, tuple[str, str | None]] = {}
+        for digest, item in raw.items():
+            if isinstance(item, str):
+                # Старый формат: только file_id; file_unique_id появится после следующей отправки
+                files[digest] = (item, None)
+            else:
+                files[digest] = (item['file_id'], item.get('file_unique_id'))
+        return files
+
+    def _save(self) -> None:
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix('.tmp')
+            data = {
+                digest: {'file_id': file_id, 'file_unique_id': file_unique_id}
+                for digest, (file_id, file_unique_id) in self._files.items()
+            }
+            tmp_path.write_bytes(orjson.dumps(data))
+            os.replace(tmp_path, self._path)
+        except Exception as e:
+            logger.warning('Failed to save media cache %s: %s', self._path, e)
+
+
+async def answer_photo_cached(message: Message, asset: Path, **kwargs: Any) -> Message:
+    """Отправляет фото по file_id из кеша; загружает файл, только если его еще нет в кеше."""
+    photo = media_cache.input_file(asset)
+    try:
+        sent = await message.answer_photo(photo=photo, **kwargs)
+    except TelegramBadRequest:
+        if isinstance(photo, FSInputFile):
+            raise
+        # file_id устарел (например, сменился токен бота) - загружаем заново
+        logger.warning('MEDIA CACHE INVALID FILE_ID: asset=%s', asset.name)
+        media_cache.forget(asset)
+        sent = await message.answer_photo(photo=FSInputFile(asset), **kwargs)
+
+    media_cache.remember(asset, sent)
+    return sent
+
+
+media_cache = MediaCache(Path(settings.media_cache_path))
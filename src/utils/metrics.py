@@ -0,0 +1,158 @@
+"""
+Метрики в текстовом формате Prometheus.
+
+Обновление метрик рассчитано на горячий путь: значения меняются только из
+event loop, поэтому блокировки не нужны, а дочерние серии по меткам
+создаются один раз и дальше берутся из словаря. Гистограмма хранит счетчики
+корзин в заранее выделенном списке; накопленные суммы считаются только при
+выдаче /metrics.
+"""
+import math
+from bisect import bisect_left
+from typing import Callable, Iterable, Iterator, Self, TypeVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+M = TypeVar('M', bound='_Metric')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], Self] = {}
+
+    def labels(self, *values: str) -> Self:
+        """Возвращает серию с заданными значениями меток (создается при первом обращении)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name}: expected labels {self.labelnames}, got {values}')
+            child = self._children[values] = self._new_child()
+        return child
+
+    def collect(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.type_name}'
+        if self.labelnames:
+            for values, child in self._children.items():
+                yield from child._samples(self.name, self.labelnames, values)
+        else:
+            yield from self._samples(self.name, (), ())
+
+    def _new_child(self) -> Self:
+        return type(self)(self.name, self.documentation)
+
+    def _samples(self, name: str, labelnames: tuple[str, ...], values: tuple[str, ...]) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class _ValueMetric(_Metric):
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+        self._function: Callable[[], float] | None = None
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Значение будет читаться из function при каждой выдаче /metrics."""
+        self._function = function
+
+    def _samples(self, name: str, labelnames: tuple[str, ...], values: tuple[str, ...]) -> Iterator[str]:
+        value = self._function() if self._function is not None else self.value
+        yield f'{name}{_format_labels(labelnames, values)} {_format_value(value)}'
+
+
+class Counter(_ValueMetric):
+    type_name = 'counter'
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class Gauge(_ValueMetric):
+    type_name = 'gauge'
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._upper_bounds = [bound for bound in sorted(buckets) if bound != math.inf]
+        # Последняя корзина - +Inf
+        self._counts = [0] * (len(self._upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self._upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def _new_child(self) -> Self:
+        return type(self)(self.name, self.documentation, buckets=self._upper_bounds)
+
+    def _samples(self, name: str, labelnames: tuple[str, ...], values: tuple[str, ...]) -> Iterator[str]:
+        cumulative = 0
+        for bound, count in zip([*self._upper_bounds, math.inf], self._counts):
+            cumulative += count
+            le = 'le="%s"' % _format_value(bound)
+            yield f'{name}_bucket{_format_labels(labelnames, values, le)} {cumulative}'
+        yield f'{name}_sum{_format_labels(labelnames, values)} {_format_value(self.sum)}'
+        yield f'{name}_count{_format_labels(labelnames, values)} {self.count}'
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.collect())
+        lines.append('')
+        return '\n'.join(lines)
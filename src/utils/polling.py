@@ -0,0 +1,153 @@
+"""
+Polling с пакетной обработкой обновлений.
+
+Обновления забираются пачками (getUpdates с limit и long-poll timeout) и
+обрабатываются параллельно: обновления разных чатов - одновременно,
+одного чата - строго по порядку. Следующая пачка запрашивается только после
+обработки текущей, а offset сохраняется на диск, поэтому после перезапуска
+обновления не теряются и не обрабатываются повторно.
+"""
+import os
+import asyncio
+from asyncio import Semaphore, Task
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import orjson
+from aiogram import Bot
+from aiogram.types import Update
+from aiogram.utils.backoff import Backoff, BackoffConfig
+
+from src.logger import logger
+
+DEFAULT_BACKOFF_CONFIG = BackoffConfig(min_delay=1.0, max_delay=5.0, factor=1.3, jitter=0.1)
+
+
+def update_routing_key(update: Update) -> int:
+    """Ключ упорядочивания: чат, иначе пользователь, иначе само обновление."""
+    event: Any = update.event
+    chat = getattr(event, 'chat', None)
+    if chat is None:
+        # callback_query: чат лежит во вложенном сообщении
+        chat = getattr(getattr(event, 'message', None), 'chat', None)
+    if chat is not None:
+        return chat.id
+
+    user = getattr(event, 'from_user', None) or getattr(event, 'user', None)
+    if user is not None:
+        return user.id
+    return update.update_id
+
+
+class BatchPollingRunner:
+    def __init__(
+        self,
+        bot: Bot,
+        handler: Callable[[Update], Awaitable[Any]],
+        offset_path: Path,
+        limit: int = 100,
+        timeout: int = 30,
+        concurrency: int = 16,
+        allowed_updates: list[str] | None = None,
+        backoff_config: BackoffConfig = DEFAULT_BACKOFF_CONFIG,
+    ) -> None:
+        self._bot = bot
+        self._handler = handler
+        self._offset_path = offset_path
+        self._limit = limit
+        self._timeout = timeout
+        self._semaphore = Semaphore(max(1, concurrency))
+        self._allowed_updates = allowed_updates
+        self._backoff = Backoff(config=backoff_config)
+        self._stopped = False
+        self._fetch_task: Task[list[Update]] | None = None
+        self.processed = 0
+        self.failed = 0
+
+    async def run(self) -> None:
+        offset = await asyncio.to_thread(self._load_offset)
+        logger.info(
+            'POLLING STARTED: offset=%s, limit=%s, timeout=%s, allowed_updates=%s',
+            offset,
+            self._limit,
+            self._timeout,
+            self._allowed_updates,
+        )
+
+        request_timeout = int((self._bot.session.timeout or 0) + self._timeout)
+        while not self._stopped:
+            self._fetch_task = asyncio.create_task(
+                self._bot.get_updates(
+                    offset=offset,
+                    limit=self._limit,
+                    timeout=self._timeout,
+                    allowed_updates=self._allowed_updates,
+                    request_timeout=request_timeout,
+                )
+            )
+            try:
+                updates = await self._fetch_task
+            except asyncio.CancelledError:
+                if self._stopped:
+                    break
+                raise
+            except Exception as e:
+                logger.error('POLLING FETCH FAILED: %s: %s, retry in %.1fs', type(e).__name__, e, self._backoff.next_delay)
+                await self._backoff.asleep()
+                continue
+            finally:
+                self._fetch_task = None
+
+            self._backoff.reset()
+            if not updates:
+                continue
+
+            await self._process_batch(updates)
+
+            # Подтверждаем пачку только после обработки: offset уйдет в следующий getUpdates
+            offset = updates[-1].update_id + 1
+            await asyncio.to_thread(self._save_offset, offset)
+
+        logger.info('POLLING STOPPED: processed=%s, failed=%s', self.processed, self.failed)
+
+    def stop(self) -> None:
+        """Останавливает polling после обработки текущей пачки."""
+        self._stopped = True
+        if self._fetch_task is not None:
+            self._fetch_task.cancel()
+
+    async def _process_batch(self, updates: list[Update]) -> None:
+        chats: dict[int, list[Update]] = {}
+        for update in updates:
+            chats.setdefault(update_routing_key(update), []).append(update)
+
+        await asyncio.gather(*(self._process_chat(chat_updates) for chat_updates in chats.values()))
+
+    async def _process_chat(self, updates: list[Update]) -> None:
+        async with self._semaphore:
+            for update in updates:
+                try:
+                    await self._handler(update)
+                except Exception as e:
+                    self.failed += 1
+                    logger.error('UPDATE PROCESSING FAILED: update_id=%s, error=%s', update.update_id, e, exc_info=True)
+                finally:
+                    self.processed += 1
+
+    def _load_offset(self) -> int | None:
+        try:
+            return orjson.loads(self._offset_path.read_bytes()).get('offset')
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning('Failed to load polling offset %s: %s', self._offset_path, e)
+            return None
+
+    def _save_offset(self, offset: int) -> None:
+        try:
+            self._offset_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._offset_path.with_suffix('.tmp')
+            tmp_path.write_bytes(orjson.dumps({'offset': offset}))
+            os.replace(tmp_path, self._offset_path)
+        except Exception as e:
+            logger.warning('Failed to save polling offset %s: %s', self._offset_path, e)
@@ -0,0 +1,87 @@
+"""
+Token bucket ограничитель исходящих запросов к Bot API.
+
+Лимиты Telegram: около 30 сообщений в секунду на бота, не больше одного
+сообщения в секунду в личный чат и 20 сообщений в минуту в группу.
+Ведра работают по принципу резервирования: каждый вызов сразу забирает
+токен и получает время, которое нужно подождать, поэтому блокировки не нужны.
+"""
+import time
+import asyncio
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated_at')
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def reserve(self) -> float:
+        """Забирает токен и возвращает задержку (в секундах) до момента, когда он станет доступен."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    async def wait(self) -> None:
+        """Забирает токен и ждет, пока он станет доступен."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def is_idle(self) -> bool:
+        """Ведро полностью восполнилось и может быть удалено без потери состояния."""
+        return self.tokens + (time.monotonic() - self.updated_at) * self.rate >= self.capacity
+
+
+class TelegramRateLimiter:
+    def __init__(
+        self,
+        global_rate: float,
+        private_chat_rate: float,
+        group_chat_rate: float,
+        chat_burst: float,
+        max_chat_buckets: int = 10000,
+    ) -> None:
+        self._global = TokenBucket(global_rate, global_rate)
+        self._private_chat_rate = private_chat_rate
+        self._group_chat_rate = group_chat_rate
+        self._chat_burst = chat_burst
+        self._max_chat_buckets = max_chat_buckets
+        self._chats: dict[int | str, TokenBucket] = {}
+        self.throttled = 0
+
+    async def acquire(self, chat_id: int | str | None = None, global_limit: bool = True) -> None:
+        """
+        Ждет, пока запрос можно будет отправить без превышения лимитов.
+
+        Args:
+            chat_id: чат, к лимиту которого относится запрос
+            global_limit: учитывать запрос в общем лимите бота (только отправка новых сообщений)
+        """
+        delay = self._global.reserve() if global_limit else 0.0
+        if chat_id is not None:
+            delay = max(delay, self._chat_bucket(chat_id).reserve())
+
+        if delay > 0:
+            self.throttled += 1
+            await asyncio.sleep(delay)
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self._max_chat_buckets:
+                self._evict_idle()
+            # Личные чаты имеют положительный ID, группы и каналы - отрицательный (или @username)
+            is_private = isinstance(chat_id, int) and chat_id > 0
+            rate = self._private_chat_rate if is_private else self._group_chat_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, self._chat_burst)
+        return bucket
+
+    def _evict_idle(self) -> None:
+        for chat_id in [chat_id for chat_id, bucket in self._chats.items() if bucket.is_idle()]:
+            del self._chats[chat_id]
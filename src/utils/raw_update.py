@@ -0,0 +1,60 @@
+"""
+Быстрый разбор сырых обновлений Telegram.
+
+Достает тип обновления, chat_id и user_id прямо из словаря, без валидации
+в модели aiogram. Полная валидация выполняется один раз в воркере очереди.
+"""
+from typing import Any, NamedTuple
+
+import orjson
+from aiogram.types import Update
+
+# Все типы обновлений, известные aiogram
+UPDATE_TYPES: frozenset[str] = frozenset(Update.model_fields) - {'update_id'}
+
+
+class UpdateMeta(NamedTuple):
+    update_id: int | None
+    update_type: str
+    chat_id: int | None
+    user_id: int | None
+
+
+def decode_update(body: bytes) -> dict[str, Any]:
+    """
+    Декодирует тело запроса вебхука.
+
+    Raises:
+        ValueError: тело не является JSON-объектом
+    """
+    data = orjson.loads(body)
+    if not isinstance(data, dict):
+        raise ValueError('Update must be a JSON object')
+    return data
+
+
+def parse_update_meta(data: dict[str, Any]) -> UpdateMeta:
+    """Извлекает тип обновления, chat_id и user_id из сырого обновления."""
+    update_type = 'unknown'
+    for key in data:
+        if key in UPDATE_TYPES:
+            update_type = key
+            break
+
+    chat_id = None
+    user_id = None
+    event = data.get(update_type)
+    if isinstance(event, dict):
+        chat = event.get('chat')
+        if chat is None:
+            # callback_query: чат лежит во вложенном сообщении
+            message = event.get('message')
+            chat = message.get('chat') if isinstance(message, dict) else None
+        if isinstance(chat, dict):
+            chat_id = chat.get('id')
+
+        user = event.get('from') or event.get('user')
+        if isinstance(user, dict):
+            user_id = user.get('id')
+
+    return UpdateMeta(data.get('update_id'), update_type, chat_id, user_id)
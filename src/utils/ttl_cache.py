@@ -0,0 +1,80 @@
+"""
+Асинхронный TTL-кеш с объединением одновременных запросов.
+
+Если значение по ключу уже загружается, остальные вызовы ждут ту же загрузку,
+а не делают свой запрос. Ошибки загрузки не кешируются. Инвалидация во время
+загрузки отменяет запись ее результата в кеш.
+"""
+import time
+import asyncio
+from asyncio import Task
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+V = TypeVar('V')
+
+
+class TTLCache(Generic[V]):
+    def __init__(self, ttl: float, maxsize: int = 10000) -> None:
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._values: dict[Hashable, tuple[float, V]] = {}
+        self._loading: dict[Hashable, Task[V]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[V]]) -> V:
+        cached = self._values.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self.hits += 1
+            return cached[1]
+
+        task = self._loading.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(self._load(key, loader))
+            self._loading[key] = task
+        else:
+            self.coalesced += 1
+
+        # shield: отмена одного ожидающего не отменяет загрузку для остальных
+        return await asyncio.shield(task)
+
+    def set(self, key: Hashable, value: V) -> None:
+        self._values.pop(key, None)
+        if len(self._values) >= self._maxsize:
+            # Вытесняем самую давнюю запись
+            self._values.pop(next(iter(self._values)))
+        self._values[key] = (time.monotonic() + self._ttl, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._values.pop(key, None)
+        self._loading.pop(key, None)
+
+    def clear(self) -> None:
+        self._values.clear()
+        self._loading.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'size': len(self._values),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+        }
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[V]]) -> V:
+        task = asyncio.current_task()
+        try:
+            value = await loader()
+        finally:
+            if self._loading.get(key) is task:
+                del self._loading[key]
+                stale = False
+            else:
+                # Ключ инвалидирован во время загрузки - результат мог устареть
+                stale = True
+
+        if not stale:
+            self.set(key, value)
+        return value
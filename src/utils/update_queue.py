@@ -0,0 +1,232 @@
+"""
+Ограниченная очередь обновлений Telegram с пулом воркеров.
+
+Каждый воркер читает свой шард очереди. Обновление попадает в шард по ключу
+(обычно chat_id), поэтому обновления одного чата обрабатываются строго по
+порядку, а разные чаты - параллельно. Размер очереди фиксирован: при
+переполнении обновление либо отклоняется (Telegram повторит его позже),
+либо вытесняет самое старое обновление шарда.
+"""
+import time
+import asyncio
+from asyncio import Queue, QueueFull, Task
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any, Awaitable, Callable, Hashable
+
+from src.logger import correlation_id_ctx, logger
+
+
+class OverloadPolicy(StrEnum):
+    REJECT = 'reject'
+    DROP_OLDEST = 'drop_oldest'
+
+
+class QueueOverloaded(Exception):
+    """Очередь заполнена, обновление не принято."""
+
+
+class QueueClosed(QueueOverloaded):
+    """Очередь закрыта на время остановки, обновление не принято."""
+
+
+@dataclass(slots=True)
+class DrainReport:
+    processed: int
+    dropped: int
+    cancelled: int
+    duration: float
+
+    @property
+    def clean(self) -> bool:
+        return not self.dropped and not self.cancelled
+
+
+@dataclass(slots=True)
+class QueuedUpdate:
+    payload: Any
+    enqueued_at: float
+    correlation_id: str | None
+
+
+class UpdateQueue:
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[Any]],
+        workers: int,
+        maxsize: int,
+        policy: str = OverloadPolicy.REJECT,
+    ) -> None:
+        self._handler = handler
+        self._workers_count = max(1, workers)
+        # Ёмкость делится поровну между шардами (с округлением вверх)
+        self._shard_size = max(1, -(-maxsize // self._workers_count))
+        self._policy = OverloadPolicy(policy)
+        self._shards: list[Queue[QueuedUpdate]] = []
+        self._workers: list[Task[None]] = []
+        self._closed = False
+
+        self._started_at = 0.0
+        self._busy = 0
+        self._busy_time = 0.0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.dropped = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._shard_size * self._workers_count
+
+    @property
+    def depth(self) -> int:
+        return sum(shard.qsize() for shard in self._shards)
+
+    @property
+    def in_flight(self) -> int:
+        return self._busy
+
+    def start(self) -> None:
+        """Создает шарды и запускает воркеры. Вызывается внутри работающего event loop."""
+        if self._workers:
+            return
+
+        self._started_at = time.monotonic()
+        self._shards = [Queue(maxsize=self._shard_size) for _ in range(self._workers_count)]
+        self._workers = [
+            asyncio.create_task(self._worker(shard), name=f'update-worker-{i}') for i, shard in enumerate(self._shards)
+        ]
+        logger.info(
+            'UPDATE QUEUE STARTED: workers=%s, capacity=%s, policy=%s',
+            self._workers_count,
+            self.capacity,
+            self._policy.value,
+        )
+
+    def close(self) -> None:
+        """Перестает принимать новые обновления; уже принятые продолжают обрабатываться."""
+        self._closed = True
+
+    async def drain(self, timeout: float) -> DrainReport:
+        """
+        Дожидается обработки принятых обновлений не дольше timeout секунд и останавливает воркеры.
+
+        Обновления, не успевшие начать обработку, отбрасываются, а зависшие - отменяются.
+        """
+        self.close()
+        started_at = time.monotonic()
+        processed_before = self.processed
+
+        try:
+            await asyncio.wait_for(asyncio.gather(*(shard.join() for shard in self._shards)), timeout)
+        except TimeoutError:
+            pass
+
+        cancelled = self._busy
+        dropped = 0
+        for shard in self._shards:
+            while not shard.empty():
+                shard.get_nowait()
+                shard.task_done()
+                dropped += 1
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self.dropped += dropped
+
+        report = DrainReport(
+            processed=self.processed - processed_before - cancelled,
+            dropped=dropped,
+            cancelled=cancelled,
+            duration=time.monotonic() - started_at,
+        )
+        logger.info(
+            'UPDATE QUEUE STOPPED: processed=%s, failed=%s, drained=%s, dropped=%s, cancelled=%s',
+            self.processed,
+            self.failed,
+            report.processed,
+            report.dropped,
+            report.cancelled,
+        )
+        return report
+
+    def put(self, payload: Any, key: Hashable) -> None:
+        """
+        Ставит обновление в очередь без ожидания.
+
+        Raises:
+            QueueClosed: очередь закрыта на время остановки
+            QueueOverloaded: шард заполнен и политика переполнения - reject
+        """
+        if self._closed:
+            raise QueueClosed
+
+        shard = self._shards[hash(key) % self._workers_count]
+        try:
+            correlation_id: str | None = correlation_id_ctx.get()
+        except LookupError:
+            correlation_id = None
+        item = QueuedUpdate(payload=payload, enqueued_at=time.monotonic(), correlation_id=correlation_id)
+
+        try:
+            shard.put_nowait(item)
+        except QueueFull:
+            if self._policy is OverloadPolicy.REJECT:
+                self.rejected += 1
+                raise QueueOverloaded from None
+
+            # drop_oldest: вытесняем самое старое обновление шарда
+            shard.get_nowait()
+            shard.task_done()
+            self.dropped += 1
+            shard.put_nowait(item)
+
+        self.enqueued += 1
+
+    def stats(self) -> dict[str, Any]:
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            'workers': self._workers_count,
+            'busy_workers': self._busy,
+            'depth': self.depth,
+            'capacity': self.capacity,
+            'policy': self._policy.value,
+            'enqueued': self.enqueued,
+            'processed': self.processed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'dropped': self.dropped,
+            'wait_time_avg': self._wait_time_total / self.processed if self.processed else 0.0,
+            'wait_time_max': self._wait_time_max,
+            'utilization': self._busy_time / (elapsed * self._workers_count) if elapsed else 0.0,
+        }
+
+    async def _worker(self, shard: Queue[QueuedUpdate]) -> None:
+        while True:
+            item = await shard.get()
+
+            started_at = time.monotonic()
+            wait_time = started_at - item.enqueued_at
+            self._wait_time_total += wait_time
+            if wait_time > self._wait_time_max:
+                self._wait_time_max = wait_time
+
+            if item.correlation_id is not None:
+                correlation_id_ctx.set(item.correlation_id)
+
+            self._busy += 1
+            try:
+                await self._handler(item.payload)
+            except Exception as e:
+                self.failed += 1
+                logger.error('UPDATE PROCESSING FAILED: %s', e, exc_info=True)
+            finally:
+                self._busy -= 1
+                self._busy_time += time.monotonic() - started_at
+                self.processed += 1
+                shard.task_done()
@@ -0,0 +1,53 @@
+from typing import Any, AsyncGenerator
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from src.integrations.tg_bot import dp
+
+
+class MockedSession(BaseSession):
+    """Сессия без сети: запоминает вызовы Bot API и отвечает заданными результатами."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.requests: list[TelegramMethod[Any]] = []
+        self.results: dict[type[TelegramMethod[Any]], Any] = {}
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+        timeout: int | None = None,
+    ) -> TelegramType:
+        self.requests.append(method)
+        return self.results.get(type(method), True)
+
+    async def stream_content(self, *args: Any, **kwargs: Any) -> AsyncGenerator[bytes, None]:
+        yield b''
+
+    async def close(self) -> None:
+        pass
+
+    def methods(self) -> list[type[TelegramMethod[Any]]]:
+        return [type(request) for request in self.requests]
+
+
+@pytest.fixture
+def session() -> MockedSession:
+    return MockedSession()
+
+
+@pytest.fixture
+def bot(session: MockedSession) -> Bot:
+    return Bot('42:TEST', session=session)
+
+
+@pytest.fixture(scope='session')
+def dispatcher() -> Dispatcher:
+    # Роутеры - синглтоны модулей, подключить их можно только к одному диспетчеру - к диспетчеру приложения.
+    # Запросы к Bot API идут через бота, переданного в feed_update, а не через бота приложения
+    return dp
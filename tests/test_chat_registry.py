@@ -0,0 +1,121 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+from aiogram.methods import GetChat, GetChatMember
+from aiogram.types import (
+    AcceptedGiftTypes,
+    Chat,
+    ChatFullInfo,
+    ChatMemberLeft,
+    ChatMemberMember,
+    ChatMemberUpdated,
+    User,
+)
+
+from src.api.tg.permissions import check_chat_permissions
+from src.integrations.chat_info import ChatInfoCache
+from src.utils.chat_registry import ChatRegistry
+
+BOT = User(id=42, is_bot=True, first_name='Bot')
+ADMIN = User(id=1, is_bot=False, first_name='Admin')
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def bot_added(chat_id: int, date: datetime = NOW) -> ChatMemberUpdated:
+    return ChatMemberUpdated(
+        chat=Chat(id=chat_id, type='supergroup', title='Group'),
+        from_user=ADMIN,
+        date=date,
+        old_chat_member=ChatMemberLeft(user=BOT),
+        new_chat_member=ChatMemberMember(user=BOT),
+    )
+
+
+def bot_removed(chat_id: int, date: datetime = NOW) -> ChatMemberUpdated:
+    return ChatMemberUpdated(
+        chat=Chat(id=chat_id, type='supergroup', title='Group'),
+        from_user=ADMIN,
+        date=date,
+        old_chat_member=ChatMemberMember(user=BOT),
+        new_chat_member=ChatMemberLeft(user=BOT),
+    )
+
+
+async def test_out_of_order_updates_are_ignored(tmp_path):
+    registry = ChatRegistry(tmp_path / 'registry.json')
+
+    assert registry.update(bot_added(-100, NOW))
+    assert not registry.update(bot_removed(-100, NOW - timedelta(seconds=1)))
+
+    assert registry.get(-100).member.status == 'member'
+    await registry.close()
+
+
+async def test_registry_survives_reload(tmp_path):
+    path = tmp_path / 'registry.json'
+    registry = ChatRegistry(path, save_delay=60)
+    registry.update(bot_added(-100))
+    registry.update(bot_added(-200))
+    registry.update(bot_removed(-200, NOW + timedelta(seconds=1)))
+    await registry.close()
+
+    reloaded = ChatRegistry(path)
+    assert len(reloaded) == 2
+    assert reloaded.get(-100).member.status == 'member'
+    assert reloaded.get(-200).member.status == 'left'
+    assert reloaded.get(-200).chat.title == 'Group'
+
+
+async def test_updates_are_saved_together_off_the_event_loop(tmp_path):
+    registry = ChatRegistry(tmp_path / 'registry.json', save_delay=0.05)
+    save = registry._save
+    threads = []
+
+    def recording_save(records):
+        threads.append(threading.current_thread())
+        save(records)
+
+    registry._save = recording_save
+    for chat_id in (-100, -200, -300):
+        registry.update(bot_added(chat_id))
+    assert threads == []
+
+    await asyncio.sleep(0.2)
+    assert len(threads) == 1
+    assert threads[0] is not threading.main_thread()
+    assert len(ChatRegistry(tmp_path / 'registry.json')) == 3
+    await registry.close()
+
+
+async def test_known_chats_are_checked_without_bot_api(tmp_path, bot, session):
+    registry = ChatRegistry(tmp_path / 'registry.json')
+    registry.update(bot_added(-100))
+
+    report = await check_chat_permissions(bot, ChatInfoCache(ttl=60, me_ttl=60), registry, -100, BOT.id)
+
+    assert report['is_member'] is True
+    assert report['chat_info']['chat_id'] == -100
+    assert session.requests == []
+    await registry.close()
+
+
+async def test_unknown_chats_are_checked_through_bot_api(tmp_path, bot, session):
+    registry = ChatRegistry(tmp_path / 'registry.json')
+    session.results[GetChat] = ChatFullInfo(
+        id=-200,
+        type='supergroup',
+        title='Other',
+        accent_color_id=0,
+        max_reaction_count=11,
+        accepted_gift_types=AcceptedGiftTypes(
+            unlimited_gifts=False, limited_gifts=False, unique_gifts=False, premium_subscription=False
+        ),
+    )
+    session.results[GetChatMember] = ChatMemberMember(user=BOT)
+
+    report = await check_chat_permissions(bot, ChatInfoCache(ttl=60, me_ttl=60), registry, -200, BOT.id)
+
+    assert report['is_member'] is True
+    assert session.methods() == [GetChat, GetChatMember]
+    await registry.close()
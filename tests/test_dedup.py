@@ -0,0 +1,53 @@
+from src.utils.dedup import UpdateDeduplicator
+
+
+class BrokenRedis:
+    async def set(self, *args, **kwargs):
+        raise ConnectionError('redis is down')
+
+    async def delete(self, *args, **kwargs):
+        raise ConnectionError('redis is down')
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.keys: set[str] = set()
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.keys:
+            return None
+        self.keys.add(key)
+        return True
+
+    async def delete(self, key):
+        self.keys.discard(key)
+
+
+async def test_duplicates_are_dropped_locally():
+    deduplicator = UpdateDeduplicator(capacity=2)
+
+    assert await deduplicator.check_and_add(1)
+    assert not await deduplicator.check_and_add(1)
+    assert await deduplicator.check_and_add(2)
+    assert await deduplicator.check_and_add(3)
+    # 1 вытеснено из буфера емкостью 2
+    assert await deduplicator.check_and_add(1)
+
+
+async def test_duplicate_from_another_replica_is_dropped():
+    redis = FakeRedis()
+    first = UpdateDeduplicator(redis=redis)
+    second = UpdateDeduplicator(redis=redis)
+
+    assert await first.check_and_add(1)
+    assert not await second.check_and_add(1)
+
+
+async def test_shared_store_failure_falls_back_to_local_ring():
+    deduplicator = UpdateDeduplicator(redis=BrokenRedis())
+
+    assert await deduplicator.check_and_add(1)
+    assert not await deduplicator.check_and_add(1)
+    await deduplicator.forget(1)
+    assert await deduplicator.check_and_add(1)
+    assert deduplicator.stats()['shared_errors'] == 3
@@ -0,0 +1,36 @@
+from aiogram.methods import AnswerCallbackQuery, EditMessageText
+
+
+def callback_query_update(data: str) -> dict:
+    chat = {'id': 1000, 'type': 'private', 'first_name': 'Test'}
+    user = {'id': 1000, 'is_bot': False, 'first_name': 'Test'}
+    return {
+        'update_id': 1,
+        'callback_query': {
+            'id': 'cb-1',
+            'from': user,
+            'chat_instance': '1',
+            'data': data,
+            'message': {
+                'message_id': 10,
+                'date': 0,
+                'chat': chat,
+                'from': {'id': 42, 'is_bot': True, 'first_name': 'Bot'},
+                'text': 'screen',
+            },
+        },
+    }
+
+
+async def test_callback_query_is_answered_and_screen_is_edited(dispatcher, bot, session):
+    await dispatcher.feed_raw_update(bot, callback_query_update('sale_type:opt'))
+
+    assert session.methods().count(AnswerCallbackQuery) == 1
+    assert session.methods().count(EditMessageText) == 1
+    answer = next(request for request in session.requests if isinstance(request, AnswerCallbackQuery))
+    assert answer.callback_query_id == 'cb-1'
+
+
+def test_used_update_types_do_not_include_chat_member(dispatcher):
+    # chat_member Telegram присылает только по явному запросу: это все вступления и выходы во всех чатах
+    assert dispatcher.resolve_used_update_types() == ['callback_query', 'message', 'my_chat_member']
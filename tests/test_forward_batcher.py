@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+
+from forward_batcher import ForwardBatcher
+
+
+def message(message_id: int, grouped_id: int | None = None) -> SimpleNamespace:
+    return SimpleNamespace(id=message_id, grouped_id=grouped_id)
+
+
+async def test_messages_within_window_form_one_batch():
+    batches = []
+
+    async def send_batch(messages):
+        batches.append([m.id for m in messages])
+
+    batcher = ForwardBatcher(send_batch, window=0.05)
+    batcher.start()
+    for i in range(3):
+        batcher.add(message(i))
+    await asyncio.sleep(0.1)
+    batcher.add(message(3))
+    await batcher.stop()
+
+    assert batches == [[0, 1, 2], [3]]
+
+
+async def test_album_is_not_split_by_max_size():
+    batches = []
+
+    async def send_batch(messages):
+        batches.append([m.id for m in messages])
+
+    batcher = ForwardBatcher(send_batch, window=10, max_size=3)
+    batcher.start()
+    batcher.add(message(1))
+    batcher.add(message(2, grouped_id=7))
+    batcher.add(message(3, grouped_id=7))
+    batcher.add(message(4, grouped_id=7))
+    await batcher.stop()
+
+    assert batches == [[1], [2, 3, 4]]
+
+
+async def test_send_errors_do_not_stop_the_worker():
+    batches = []
+
+    async def send_batch(messages):
+        if messages[0].id == 1:
+            raise RuntimeError('boom')
+        batches.append([m.id for m in messages])
+
+    batcher = ForwardBatcher(send_batch, window=0.01)
+    batcher.start()
+    batcher.add(message(1))
+    await asyncio.sleep(0.05)
+    batcher.add(message(2))
+    await batcher.stop()
+
+    assert batches == [[2]]
@@ -0,0 +1,281 @@
+import os
+import sys
+import json
+import asyncio
+import importlib
+from types import ModuleType, SimpleNamespace
+
+import pytest
+from telethon import types, utils
+
+from outbox import PermanentForwardError
+
+# config.py пересыльщика не входит в репозиторий: для импорта main достаточно заглушки
+if importlib.util.find_spec('config') is None:
+    sys.modules['config'] = ModuleType('config')
+    sys.modules['config'].Config = object
+main = importlib.import_module('main')
+
+SOURCE = types.Chat(id=1, title='Source', photo=types.ChatPhotoEmpty(), participants_count=1, date=None, version=1)
+FIRST = types.Chat(id=2, title='First', photo=types.ChatPhotoEmpty(), participants_count=1, date=None, version=1)
+SECOND = types.Chat(id=3, title='Second', photo=types.ChatPhotoEmpty(), participants_count=1, date=None, version=1)
+
+
+class FakeClient:
+    """Клиент Telethon без сети: чаты берутся из entities, запросы к API запоминаются."""
+
+    def __init__(self):
+        self.kwargs = {}
+        self.entities = {'@source': SOURCE, -2: FIRST, -3: SECOND}
+        self.unavailable = set()
+        self.handlers = []
+        self.requests = []
+        self.history = []
+        self.history_failures = 0
+
+    async def start(self):
+        return self
+
+    async def is_user_authorized(self):
+        return True
+
+    async def get_me(self):
+        return SimpleNamespace(first_name='Test', username='test')
+
+    async def get_dialogs(self, limit=None):
+        return []
+
+    async def get_entity(self, chat_id):
+        if chat_id in self.unavailable:
+            raise ValueError(f'Cannot find any entity corresponding to "{chat_id}"')
+        return self.entities[chat_id]
+
+    async def get_input_entity(self, peer):
+        if isinstance(peer, int):
+            peer = next(entity for entity in self.entities.values() if utils.get_peer_id(entity) == peer)
+        return utils.get_input_peer(peer)
+
+    def on(self, event):
+        def decorator(handler):
+            self.handlers.append((event, handler))
+            return handler
+
+        return decorator
+
+    async def run_until_disconnected(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    def iter_messages(self, entity, min_id=0, max_id=0, limit=None):
+        return self._iter_messages(min_id, max_id, limit)
+
+    async def _iter_messages(self, min_id, max_id, limit):
+        if self.history_failures:
+            self.history_failures -= 1
+            raise ConnectionError('history is unavailable')
+        messages = [message for message in reversed(self.history) if message.id > min_id]
+        for message in [message for message in messages if not max_id or message.id < max_id][:limit]:
+            yield message
+
+    async def __call__(self, request, ordered=False, flood_sleep_threshold=None):
+        self.requests.append((request, flood_sleep_threshold))
+
+    def forwarded(self):
+        return [(request.to_peer.chat_id, request.id) for request, _ in self.requests]
+
+    def forwarded_ids(self):
+        return sorted(message_id for request, _ in self.requests for message_id in request.id)
+
+
+async def wait_until(condition, timeout: float = 2.0) -> None:
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+@pytest.fixture
+def client(monkeypatch) -> FakeClient:
+    client = FakeClient()
+
+    def create_client(session, **kwargs):
+        client.kwargs = kwargs
+        return client
+
+    monkeypatch.setattr(main, 'TelegramClient', create_client)
+    return client
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    # Состояние и очередь пересылок пишутся в data/ текущей директории
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, 'FORWARD_BATCH_WINDOW', 0.01)
+    monkeypatch.setattr(main, 'FORWARD_TARGET_INTERVAL', 0)
+    monkeypatch.setattr(main, 'FORWARD_CATCHUP_MAX_WAIT', 0.01)
+    return SimpleNamespace(
+        telegram_session_string='',
+        api_id=1,
+        api_hash='hash',
+        source_chat_id='@source',
+        get_target_chat_ids=lambda: ['-2', '-3'],
+    )
+
+
+@pytest.fixture
+def forwarder(config, client):
+    return main.MessageForwarder(config)
+
+
+def message(message_id: int, action=None):
+    return SimpleNamespace(id=message_id, grouped_id=None, action=action)
+
+
+def new_message(message_id: int):
+    return SimpleNamespace(id=message_id, chat_id=-1, message=message(message_id))
+
+
+def save_state(last_forwarded_message_id: int):
+    os.makedirs('data', exist_ok=True)
+    with open('data/forwarder_state.json', 'w') as f:
+        json.dump({'target_chat_index': 0, 'last_forwarded_message_id': last_forwarded_message_id}, f)
+
+
+async def test_source_chat_is_resolved_to_peer_id(forwarder, client):
+    await forwarder.start()
+
+    (event, handler), = client.handlers
+    assert event.chats == -1
+    assert forwarder.source_peer == -1
+
+    await handler(new_message(10))
+    await handler(new_message(11))
+    await wait_until(lambda: client.forwarded() == [(2, [10, 11])])
+    await forwarder.stop()
+
+
+async def test_source_chat_falls_back_to_configured_id(forwarder, client):
+    client.unavailable.add('@source')
+    await forwarder.start()
+
+    (event, _), = client.handlers
+    assert event.chats == '@source'
+    await forwarder.stop()
+
+
+async def test_target_that_failed_to_resolve_at_startup_is_retried(forwarder, client):
+    client.unavailable.add(-3)
+    await forwarder.start()
+    assert list(forwarder.target_chat_entities) == ['-2']
+
+    # Пока чат недоступен, ошибка временная: очередь повторит пачку
+    with pytest.raises(ValueError):
+        await forwarder.deliver('-3', [5])
+
+    client.unavailable.clear()
+    await forwarder.deliver('-3', [5])
+    assert client.forwarded() == [(3, [5])]
+    await forwarder.stop()
+
+
+async def test_flood_wait_is_not_slept_through_only_for_forwarding(forwarder, client):
+    await forwarder.start()
+    await forwarder.deliver('-2', [5])
+
+    # Остальные вызовы клиента пережидают FloodWait как обычно
+    assert 'flood_sleep_threshold' not in client.kwargs
+    assert [threshold for _, threshold in client.requests] == [0]
+    await forwarder.stop()
+
+
+async def test_batches_for_targets_removed_from_config_fail(forwarder, client):
+    await forwarder.start()
+
+    with pytest.raises(PermanentForwardError):
+        await forwarder.deliver('-4', [5])
+    assert client.requests == []
+    await forwarder.stop()
+
+
+async def test_batches_go_round_robin_by_chat_id(forwarder, client):
+    await forwarder.start()
+
+    await forwarder.forward_batch([SimpleNamespace(id=1)])
+    await forwarder.forward_batch([SimpleNamespace(id=2)])
+    await forwarder.forward_batch([SimpleNamespace(id=3)])
+
+    await wait_until(lambda: len(client.forwarded()) == 3)
+    assert sorted(client.forwarded()) == [(2, [1]), (2, [3]), (3, [2])]
+    await forwarder.stop()
+
+
+async def test_catch_up_forwards_missed_messages_before_new_ones(config, client):
+    save_state(100)
+    client.history = [message(99), message(101), message(102, action='pin'), message(103)]
+    client.history_failures = 1
+    forwarder = main.MessageForwarder(config)
+
+    async def fetch_during_catch_up(*args, **kwargs):
+        # Новые сообщения, пришедшие во время догонялки, не дублируют пропущенные
+        await forwarder.handle_new_message(new_message(103))
+        await forwarder.handle_new_message(new_message(104))
+        return await fetch_missed(*args, **kwargs)
+
+    fetch_missed = forwarder._fetch_missed
+    forwarder._fetch_missed = fetch_during_catch_up
+    await forwarder.start()
+
+    await wait_until(lambda: client.forwarded_ids() == [101, 103, 104])
+    assert client.forwarded() == [(2, [101, 103, 104])]
+    await forwarder.stop()
+
+
+async def test_catch_up_forwards_only_the_newest_messages_over_the_limit(config, client, monkeypatch):
+    monkeypatch.setattr(main, 'FORWARD_CATCHUP_LIMIT', 2)
+    save_state(100)
+    client.history = [message(message_id) for message_id in range(101, 106)]
+    forwarder = main.MessageForwarder(config)
+
+    await forwarder.start()
+
+    await wait_until(lambda: client.forwarded_ids() == [104, 105])
+    await forwarder.stop()
+
+
+async def test_catch_up_gives_up_after_the_configured_attempts(forwarder, client, monkeypatch):
+    monkeypatch.setattr(main, 'FORWARD_CATCHUP_ATTEMPTS', 2)
+    forwarder.client = client
+    client.history = [message(101)]
+    client.history_failures = 2
+
+    assert await forwarder._fetch_missed(100) is None
+    assert client.history_failures == 0
+
+
+async def test_missed_range_is_backfilled_on_next_start_without_duplicates(config, client):
+    save_state(100)
+    client.history_failures = main.FORWARD_CATCHUP_ATTEMPTS
+    forwarder = main.MessageForwarder(config)
+    await forwarder.start()
+
+    # Догнать не удалось, новые сообщения пересылаются и двигают отметку дальше
+    (_, handler), = client.handlers
+    await handler(new_message(250))
+    await handler(new_message(251))
+    await wait_until(lambda: client.forwarded_ids() == [250, 251])
+    await forwarder.stop()
+
+    client.requests.clear()
+    client.handlers.clear()
+    client.history = [message(message_id) for message_id in (101, 102, 103, 250, 251, 252)]
+    restarted = main.MessageForwarder(config)
+    assert restarted.state.gaps == [(100, 250)]
+    await restarted.start()
+
+    await wait_until(lambda: client.forwarded_ids() == [101, 102, 103, 252])
+    await restarted.stop()
+    assert restarted.state.gaps == []
+    assert restarted.state.last_forwarded_message_id == 252
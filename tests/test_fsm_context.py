@@ -0,0 +1,112 @@
+from typing import Any, Mapping
+
+import pytest
+from aiogram.fsm.storage.base import StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from src.storage.context import TrackedFSMContext, fsm_write_stats
+
+KEY = StorageKey(bot_id=42, chat_id=1000, user_id=1000)
+
+
+class CountingStorage(MemoryStorage):
+    def __init__(self) -> None:
+        super().__init__()
+        self.reads: list[str] = []
+        self.writes: list[str] = []
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        self.writes.append('state')
+        await super().set_state(key, state)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        self.reads.append('state')
+        return await super().get_state(key)
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        self.writes.append('data')
+        await super().set_data(key, data)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        self.reads.append('data')
+        return await super().get_data(key)
+
+
+@pytest.fixture
+def storage() -> CountingStorage:
+    return CountingStorage()
+
+
+async def test_state_is_written_only_when_changed(storage):
+    context = TrackedFSMContext(storage, KEY, 'form:name')
+
+    await context.set_state('form:name')
+    assert storage.writes == []
+
+    await context.set_state('form:age')
+    assert await context.get_state() == 'form:age'
+    assert storage.writes == ['state']
+    assert storage.reads == []
+
+
+async def test_data_is_read_once_and_unchanged_data_is_not_written(storage):
+    await storage.set_data(KEY, {'name': 'Test'})
+    storage.writes.clear()
+    context = TrackedFSMContext(storage, KEY, None)
+    skipped_writes = fsm_write_stats.skipped_writes
+
+    data = await context.get_data()
+    data['name'] = 'Changed'
+    assert await context.get_value('name') == 'Test'
+    await context.update_data(name='Test')
+    await context.set_data({'name': 'Test'})
+
+    assert storage.reads == ['data']
+    assert storage.writes == []
+    assert fsm_write_stats.skipped_writes == skipped_writes + 2
+
+    await context.update_data(age=20)
+    assert storage.writes == ['data']
+    assert await storage.get_data(KEY) == {'name': 'Test', 'age': 20}
+
+
+async def test_data_is_written_when_it_was_not_read(storage):
+    context = TrackedFSMContext(storage, KEY, None)
+
+    await context.set_data({})
+
+    assert storage.writes == ['data']
+    assert storage.reads == []
+
+
+async def test_clear_without_state_reads_data_instead_of_writing(storage):
+    context = TrackedFSMContext(storage, KEY, None)
+    extra_reads = fsm_write_stats.extra_reads
+
+    await context.clear()
+
+    assert storage.reads == ['data']
+    assert storage.writes == []
+    assert fsm_write_stats.extra_reads == extra_reads + 1
+
+
+async def test_clear_with_leftover_data_removes_it(storage):
+    await storage.set_data(KEY, {'name': 'Test'})
+    storage.writes.clear()
+    context = TrackedFSMContext(storage, KEY, None)
+
+    await context.clear()
+
+    assert storage.reads == ['data']
+    assert storage.writes == ['data']
+    assert await storage.get_data(KEY) == {}
+
+
+async def test_clear_with_state_writes_without_reading(storage):
+    context = TrackedFSMContext(storage, KEY, 'form:name')
+
+    await context.clear()
+
+    assert storage.reads == []
+    assert storage.writes == ['state', 'data']
+    assert await context.get_state() is None
@@ -0,0 +1,77 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from src import logger as logger_module
+from src.logger import SamplingFilter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(logger_module, 'time', SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def record(msg: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord('tinder_bot', level, __file__, 1, msg, (1,), None)
+
+
+def kept(sampling: SamplingFilter, msg: str, count: int, level: int = logging.INFO) -> int:
+    return sum(sampling.filter(record(msg, level)) for _ in range(count))
+
+
+def test_every_nth_record_is_kept(clock):
+    sampling = SamplingFilter({'WEBHOOK UPDATE RECEIVED': {'every': 10}})
+
+    assert kept(sampling, 'WEBHOOK UPDATE RECEIVED: update_id=%s', 25) == 3
+    assert kept(sampling, 'OTHER: update_id=%s', 25) == 25
+
+
+def test_per_second_limit_resets_every_second(clock):
+    sampling = SamplingFilter({'PERMISSIONS CHECK STATUS': {'per_second': 3}})
+
+    assert kept(sampling, 'PERMISSIONS CHECK STATUS: chat_id=%s', 10) == 3
+    clock.now += 0.5
+    assert kept(sampling, 'PERMISSIONS CHECK STATUS: chat_id=%s', 10) == 0
+    clock.now += 0.5
+    assert kept(sampling, 'PERMISSIONS CHECK STATUS: chat_id=%s', 10) == 3
+
+
+def test_keys_are_counted_separately(clock):
+    sampling = SamplingFilter(
+        {'PERMISSIONS CHECK STATUS': {'per_second': 1}, 'PERMISSIONS CHECK RESULT': {'per_second': 1}}
+    )
+
+    assert kept(sampling, 'PERMISSIONS CHECK STATUS: chat_id=%s', 5) == 1
+    assert kept(sampling, 'PERMISSIONS CHECK RESULT: chat_id=%s', 5) == 1
+
+
+def test_warnings_are_never_sampled(clock):
+    sampling = SamplingFilter({'WEBHOOK UPDATE RECEIVED': {'every': 100}})
+
+    assert kept(sampling, 'WEBHOOK UPDATE RECEIVED: update_id=%s', 5, logging.WARNING) == 5
+    assert kept(sampling, 'WEBHOOK UPDATE RECEIVED: update_id=%s', 5, logging.ERROR) == 5
+
+
+def test_summary_reports_suppressed_records(clock, caplog):
+    sampling = SamplingFilter({'WEBHOOK UPDATE RECEIVED': {'every': 10}}, summary_interval=60)
+    kept(sampling, 'WEBHOOK UPDATE RECEIVED: update_id=%s', 10)
+    assert 'LOG SAMPLING SUMMARY' not in caplog.text
+
+    clock.now += 60
+    with caplog.at_level(logging.INFO, logger='tinder_bot'):
+        sampling.filter(record('WEBHOOK UPDATE RECEIVED: update_id=%s'))
+
+    summaries = [r for r in caplog.records if r.msg.startswith('LOG SAMPLING SUMMARY')]
+    assert len(summaries) == 1
+    assert summaries[0].args == (60, {'WEBHOOK UPDATE RECEIVED': 9})
@@ -0,0 +1,88 @@
+import math
+
+import pytest
+
+from src.utils.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    updates = registry.register(Counter('updates_total', 'Processed updates', ['type']))
+    depth = registry.register(Gauge('queue_depth', 'Queue depth'))
+    updates.labels('message').inc()
+    updates.labels('message').inc(2)
+    updates.labels('callback_query').inc()
+    depth.set(1.5)
+
+    assert registry.render() == (
+        '# HELP updates_total Processed updates\n'
+        '# TYPE updates_total counter\n'
+        'updates_total{type="message"} 3\n'
+        'updates_total{type="callback_query"} 1\n'
+        '# HELP queue_depth Queue depth\n'
+        '# TYPE queue_depth gauge\n'
+        'queue_depth 1.5\n'
+    )
+
+
+def test_label_values_are_escaped():
+    counter = Counter('errors_total', 'Errors', ['error'])
+    counter.labels('path\\to "file"\nline 2').inc()
+
+    assert list(counter.collect())[-1] == 'errors_total{error="path\\\\to \\"file\\"\\nline 2"} 1'
+
+
+def test_wrong_number_of_labels_is_rejected():
+    counter = Counter('errors_total', 'Errors', ['error', 'method'])
+
+    with pytest.raises(ValueError):
+        counter.labels('timeout')
+
+
+def test_metric_names_are_unique():
+    registry = MetricsRegistry()
+    registry.register(Counter('updates_total', 'Processed updates'))
+
+    with pytest.raises(ValueError):
+        registry.register(Gauge('updates_total', 'Processed updates'))
+
+
+def test_gauge_reads_value_from_function():
+    gauge = Gauge('queue_depth', 'Queue depth')
+    depth = [3]
+    gauge.set_function(lambda: depth[0])
+    depth[0] = 7
+
+    assert list(gauge.collect())[-1] == 'queue_depth 7'
+
+
+def test_histogram_buckets_are_cumulative_and_include_upper_bound():
+    histogram = Histogram('duration_seconds', 'Duration', ['handler'], buckets=[1.0, 0.1, math.inf])
+    child = histogram.labels('start')
+    for value in (0.05, 0.1, 0.5, 1.0, 3.0):
+        child.observe(value)
+
+    assert list(histogram.collect())[2:] == [
+        'duration_seconds_bucket{handler="start",le="0.1"} 2',
+        'duration_seconds_bucket{handler="start",le="1"} 4',
+        'duration_seconds_bucket{handler="start",le="+Inf"} 5',
+        'duration_seconds_sum{handler="start"} 4.65',
+        'duration_seconds_count{handler="start"} 5',
+    ]
+
+
+def test_histogram_children_share_buckets():
+    histogram = Histogram('duration_seconds', 'Duration', ['handler'], buckets=[0.5])
+    histogram.labels('start').observe(0.1)
+    histogram.labels('help').observe(1.0)
+
+    assert list(histogram.collect())[2:] == [
+        'duration_seconds_bucket{handler="start",le="0.5"} 1',
+        'duration_seconds_bucket{handler="start",le="+Inf"} 1',
+        'duration_seconds_sum{handler="start"} 0.1',
+        'duration_seconds_count{handler="start"} 1',
+        'duration_seconds_bucket{handler="help",le="0.5"} 0',
+        'duration_seconds_bucket{handler="help",le="+Inf"} 1',
+        'duration_seconds_sum{handler="help"} 1',
+        'duration_seconds_count{handler="help"} 1',
+    ]
@@ -0,0 +1,155 @@
+import time
+import asyncio
+import sqlite3
+
+from telethon.errors import FloodWaitError
+
+from outbox import Outbox, PermanentForwardError
+
+
+def flood_wait(seconds: int) -> FloodWaitError:
+    error = FloodWaitError(None)
+    error.seconds = seconds
+    return error
+
+
+async def wait_until(condition, timeout: float = 2.0) -> None:
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def test_batches_are_delivered_in_order_and_removed(tmp_path):
+    delivered = []
+
+    async def deliver(target_chat_id, message_ids):
+        delivered.append((target_chat_id, message_ids))
+
+    outbox = Outbox(str(tmp_path / 'outbox.sqlite3'), deliver, target_interval=0)
+    await outbox.open()
+    outbox.start()
+    await outbox.put('-1001', [1, 2])
+    await outbox.put('-1001', [3])
+    await outbox.put('-1002', [4])
+
+    await wait_until(lambda: len(delivered) == 3)
+    assert [ids for target, ids in delivered if target == '-1001'] == [[1, 2], [3]]
+    assert await outbox.pending() == 0
+    await outbox.stop()
+
+
+async def test_flood_wait_pauses_only_its_target(tmp_path):
+    delivered = []
+    flooded = False
+
+    async def deliver(target_chat_id, message_ids):
+        nonlocal flooded
+        if target_chat_id == '-1001' and not flooded:
+            flooded = True
+            raise flood_wait(1)
+        delivered.append(message_ids)
+
+    outbox = Outbox(str(tmp_path / 'outbox.sqlite3'), deliver, target_interval=0)
+    await outbox.open()
+    outbox.start()
+    await outbox.put('-1001', [1])
+    await outbox.put('-1002', [2])
+
+    await wait_until(lambda: delivered == [[2]])
+    await wait_until(lambda: delivered == [[2], [1]])
+    await outbox.stop()
+
+
+async def test_errors_are_retried_and_permanent_errors_fail(tmp_path):
+    attempts = {}
+
+    async def deliver(target_chat_id, message_ids):
+        attempts[message_ids[0]] = attempts.get(message_ids[0], 0) + 1
+        if message_ids == [1] and attempts[1] < 3:
+            raise ConnectionError('network')
+        if message_ids == [2]:
+            raise PermanentForwardError('target is gone')
+
+    outbox = Outbox(str(tmp_path / 'outbox.sqlite3'), deliver, base_delay=0.01, target_interval=0)
+    await outbox.open()
+    outbox.start()
+    await outbox.put('-1001', [1])
+    await outbox.put('-1002', [2])
+
+    await wait_until(lambda: attempts.get(1) == 3 and 2 in attempts)
+    await asyncio.sleep(0.05)
+    assert attempts[2] == 1
+    assert await outbox.pending() == 0
+    await outbox.stop()
+
+
+async def test_pending_batches_survive_restart(tmp_path):
+    path = str(tmp_path / 'outbox.sqlite3')
+    delivered = []
+
+    async def deliver(target_chat_id, message_ids):
+        delivered.append((target_chat_id, message_ids))
+
+    outbox = Outbox(path, deliver)
+    await outbox.open()
+    await outbox.put('@channel', [1])
+    await outbox.stop()
+
+    restarted = Outbox(path, deliver)
+    await restarted.open()
+    assert await restarted.pending() == 1
+    restarted.start()
+    # Пачка уходит в тот же чат, даже если список чатов в конфигурации изменился
+    await wait_until(lambda: delivered == [('@channel', [1])])
+    await restarted.stop()
+
+
+async def test_database_errors_do_not_stop_the_worker(tmp_path):
+    delivered = []
+
+    async def deliver(target_chat_id, message_ids):
+        delivered.append(message_ids)
+
+    outbox = Outbox(str(tmp_path / 'outbox.sqlite3'), deliver, base_delay=0.01, target_interval=0)
+    await outbox.open()
+    query = outbox._query
+    failures = 2
+
+    def flaky_query(sql, params):
+        nonlocal failures
+        if failures:
+            failures -= 1
+            raise sqlite3.OperationalError('database is locked')
+        return query(sql, params)
+
+    outbox._query = flaky_query
+    await outbox.put('-1001', [1])
+    outbox.start()
+
+    await wait_until(lambda: delivered == [[1]])
+    assert failures == 0
+    await outbox.stop()
+
+
+async def test_paused_target_with_many_batches_does_not_hide_other_targets(tmp_path):
+    path = str(tmp_path / 'outbox.sqlite3')
+    delivered = []
+
+    async def deliver(target_chat_id, message_ids):
+        delivered.append((target_chat_id, message_ids))
+
+    outbox = Outbox(path, deliver, target_interval=0)
+    await outbox.open()
+    # Больше тысячи пачек первого чата ждут повтора
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO outbox (target_chat_id, message_ids, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+            [('-1001', f'[{i}]', time.time() + 60, 0.0) for i in range(1500)],
+        )
+    await outbox.put('-1002', [2000])
+    outbox.start()
+
+    await wait_until(lambda: delivered == [('-1002', [2000])])
+    await outbox.stop()
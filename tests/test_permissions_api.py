@@ -0,0 +1,53 @@
+import pytest
+from fastapi import HTTPException
+
+from src.api.tg.tg import verify_api_token
+from src.integrations.chat_info import ChatInfoCache
+from src.utils.rate_limiter import TokenBucket
+
+from conf.config import settings
+
+
+@pytest.mark.parametrize(
+    ('configured', 'sent', 'status_code'),
+    [
+        (None, 'secret', 403),
+        ('secret', None, 401),
+        ('secret', 'wrong', 401),
+    ],
+)
+def test_bulk_api_token_is_required(monkeypatch, configured, sent, status_code):
+    monkeypatch.setattr(settings, 'permissions_api_token', configured)
+
+    with pytest.raises(HTTPException) as exc_info:
+        verify_api_token(sent)
+
+    assert exc_info.value.status_code == status_code
+
+
+def test_bulk_api_accepts_configured_token(monkeypatch):
+    monkeypatch.setattr(settings, 'permissions_api_token', 'secret')
+
+    verify_api_token('secret')
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def get_chat(self, chat_id):
+        self.calls += 1
+        return {'id': chat_id}
+
+
+async def test_budget_is_spent_only_on_cache_miss():
+    chat_info = ChatInfoCache(ttl=60, me_ttl=60)
+    budget = TokenBucket(rate=1, capacity=2)
+    bot = FakeBot()
+
+    await chat_info.get_chat(bot, -100, budget)
+    await chat_info.get_chat(bot, -100, budget)
+    await chat_info.get_chat(bot, -200, budget)
+
+    assert bot.calls == 2
+    assert budget.tokens < 0.1
@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timezone
+
+import orjson
+from aiogram.methods import GetUpdates
+from aiogram.types import Chat, Message, Update
+
+from src.utils.polling import BatchPollingRunner
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def update(update_id: int, chat_id: int) -> Update:
+    chat = Chat(id=chat_id, type='private')
+    return Update(update_id=update_id, message=Message(message_id=update_id, date=NOW, chat=chat, text='text'))
+
+
+async def test_chats_are_processed_concurrently_and_each_chat_in_order(tmp_path, bot, session):
+    session.results[GetUpdates] = [update(1, 100), update(2, 200), update(3, 100)]
+    second_chat_started = asyncio.Event()
+    events = []
+
+    async def handler(received):
+        events.append(('start', received.update_id))
+        if received.update_id == 1:
+            # Первое обновление чата 100 ждет чат 200: пачка обрабатывается параллельно по чатам
+            await asyncio.wait_for(second_chat_started.wait(), 1)
+        if received.update_id == 2:
+            second_chat_started.set()
+        events.append(('end', received.update_id))
+        if received.update_id == 3:
+            runner.stop()
+
+    runner = BatchPollingRunner(bot, handler, tmp_path / 'offset.json')
+    await asyncio.wait_for(runner.run(), 2)
+
+    first_chat = [event for event in events if event[1] != 2]
+    assert first_chat == [('start', 1), ('end', 1), ('start', 3), ('end', 3)]
+    assert events.index(('start', 2)) < events.index(('end', 1))
+    assert runner.processed == 3
+
+
+async def test_offset_is_saved_after_the_batch_and_used_on_restart(tmp_path, bot, session):
+    offset_path = tmp_path / 'polling' / 'offset.json'
+    session.results[GetUpdates] = [update(10, 100), update(11, 200)]
+    saved_during_processing = []
+
+    async def handler(received):
+        saved_during_processing.append(offset_path.exists())
+        if received.update_id == 11:
+            raise ValueError('handler failed')
+        runner.stop()
+
+    runner = BatchPollingRunner(bot, handler, offset_path)
+    await asyncio.wait_for(runner.run(), 2)
+
+    # Offset подтверждается только после всей пачки, в том числе если обработчик упал
+    assert saved_during_processing == [False, False]
+    assert runner.failed == 1
+    assert orjson.loads(offset_path.read_bytes()) == {'offset': 12}
+    assert list(offset_path.parent.iterdir()) == [offset_path]
+
+    async def stop(received):
+        restarted.stop()
+
+    session.requests.clear()
+    restarted = BatchPollingRunner(bot, stop, offset_path)
+    await asyncio.wait_for(restarted.run(), 2)
+    assert session.requests[0].offset == 12
+
+
+async def test_unreadable_offset_starts_from_the_beginning(tmp_path, bot, session):
+    offset_path = tmp_path / 'offset.json'
+    offset_path.write_bytes(b'{broken')
+    session.results[GetUpdates] = [update(1, 100)]
+
+    async def handler(received):
+        runner.stop()
+
+    runner = BatchPollingRunner(bot, handler, offset_path)
+    await asyncio.wait_for(runner.run(), 2)
+
+    assert session.requests[0].offset is None
+    assert orjson.loads(offset_path.read_bytes()) == {'offset': 2}
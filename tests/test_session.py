@@ -0,0 +1,143 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.exceptions import TelegramNetworkError, TelegramServerError
+from aiogram.methods import EditMessageText, GetChat, GetChatMember, SendMessage
+from aiohttp import ClientConnectorError, ClientError
+
+from src.integrations.session import TelegramSession
+from src.utils.rate_limiter import TelegramRateLimiter
+
+
+class RecordingRateLimiter(TelegramRateLimiter):
+    def __init__(self) -> None:
+        super().__init__(global_rate=30, private_chat_rate=1, group_chat_rate=1 / 3, chat_burst=3)
+        self.calls: list[tuple[int | str | None, bool]] = []
+
+    async def acquire(self, chat_id: int | str | None = None, global_limit: bool = True) -> None:
+        self.calls.append((chat_id, global_limit))
+
+
+@pytest.fixture
+def rate_limiter(monkeypatch) -> RecordingRateLimiter:
+    async def make_request(self, bot, method, timeout=None):
+        return True
+
+    monkeypatch.setattr(AiohttpSession, 'make_request', make_request)
+    return RecordingRateLimiter()
+
+
+@pytest.mark.parametrize(
+    ('method', 'expected'),
+    [
+        (SendMessage(chat_id=1, text='hi'), [(1, True)]),
+        (EditMessageText(chat_id=-100, message_id=1, text='hi'), [(-100, False)]),
+        (GetChat(chat_id=-100), []),
+        (GetChatMember(chat_id=-100, user_id=1), []),
+    ],
+)
+async def test_only_sending_methods_use_global_limit(bot, rate_limiter, method, expected):
+    session = TelegramSession(rate_limiter=rate_limiter)
+
+    await session.make_request(bot, method)
+
+    assert rate_limiter.calls == expected
+
+
+async def test_lookups_do_not_consume_global_budget():
+    rate_limiter = TelegramRateLimiter(global_rate=1, private_chat_rate=1, group_chat_rate=1, chat_burst=1)
+
+    await rate_limiter.acquire(-100, global_limit=False)
+    await rate_limiter.acquire(-200, global_limit=False)
+
+    assert rate_limiter.throttled == 0
+
+
+class FakeTransport:
+    """Подменяет запросы AiohttpSession: отдает заданные ответы по очереди и считает попытки."""
+
+    def __init__(self, *responses) -> None:
+        self.responses = list(responses)
+        self.attempts = 0
+
+    async def make_request(self, session, bot, method, timeout=None):
+        self.attempts += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            try:
+                raise response
+            except asyncio.TimeoutError:
+                raise TelegramNetworkError(method=method, message='Request timeout error')
+            except ClientError as e:
+                raise TelegramNetworkError(method=method, message=f'{type(e).__name__}: {e}')
+        if response is OK:
+            return True
+        status_code, content = response
+        return session.check_response(bot=bot, method=method, status_code=status_code, content=content).result
+
+
+OK = object()
+SERVER_ERROR = (500, '{"ok": false, "error_code": 500, "description": "Internal Server Error"}')
+TOO_MANY_REQUESTS = (
+    429,
+    '{"ok": false, "error_code": 429, "description": "Too Many Requests", "parameters": {"retry_after": 0}}',
+)
+CONNECTION_REFUSED = ClientConnectorError(
+    SimpleNamespace(host='api.telegram.org', port=443, ssl=True), ConnectionRefusedError(111, 'refused')
+)
+
+
+def fake_transport(monkeypatch, *responses) -> FakeTransport:
+    transport = FakeTransport(*responses)
+
+    async def make_request(self, bot, method, timeout=None):
+        return await transport.make_request(self, bot, method, timeout)
+
+    monkeypatch.setattr(AiohttpSession, 'make_request', make_request)
+    return transport
+
+
+def retrying_session(rate_limiter: TelegramRateLimiter | None = None) -> TelegramSession:
+    return TelegramSession(rate_limiter=rate_limiter, base_delay=0, jitter=0, retry_status_codes={429, 500})
+
+
+@pytest.mark.parametrize(
+    ('error', 'exception'),
+    [(SERVER_ERROR, TelegramServerError), (asyncio.TimeoutError(), TelegramNetworkError)],
+)
+async def test_sending_is_not_retried_after_it_may_have_been_accepted(bot, monkeypatch, error, exception):
+    transport = fake_transport(monkeypatch, error, OK)
+
+    with pytest.raises(exception):
+        await retrying_session().make_request(bot, SendMessage(chat_id=1, text='hi'))
+
+    assert transport.attempts == 1
+
+
+@pytest.mark.parametrize('error', [TOO_MANY_REQUESTS, CONNECTION_REFUSED])
+async def test_sending_is_retried_when_it_was_not_accepted(bot, monkeypatch, error):
+    transport = fake_transport(monkeypatch, error, OK)
+
+    assert await retrying_session().make_request(bot, SendMessage(chat_id=1, text='hi')) is True
+    assert transport.attempts == 2
+
+
+@pytest.mark.parametrize('error', [SERVER_ERROR, asyncio.TimeoutError()])
+async def test_reads_and_edits_are_retried_after_server_errors(bot, monkeypatch, error):
+    transport = fake_transport(monkeypatch, error, OK, error, OK)
+    session = retrying_session()
+
+    assert await session.make_request(bot, GetChat(chat_id=-100)) is True
+    assert await session.make_request(bot, EditMessageText(chat_id=-100, message_id=1, text='hi')) is True
+    assert transport.attempts == 4
+
+
+async def test_every_attempt_acquires_a_rate_limit_token(bot, monkeypatch):
+    fake_transport(monkeypatch, TOO_MANY_REQUESTS, TOO_MANY_REQUESTS, OK)
+    rate_limiter = RecordingRateLimiter()
+
+    await retrying_session(rate_limiter).make_request(bot, SendMessage(chat_id=1, text='hi'))
+
+    assert rate_limiter.calls == [(1, True)] * 3
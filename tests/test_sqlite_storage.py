@@ -0,0 +1,70 @@
+import time
+import asyncio
+
+from aiogram.fsm.storage.base import StorageKey
+
+from src.storage.sqlite import SQLiteStorage
+
+KEY = StorageKey(bot_id=42, chat_id=1000, user_id=1000)
+
+
+async def test_buffered_writes_are_visible_before_flush(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / 'fsm.sqlite3'), flush_interval=60)
+
+    await storage.set_state(KEY, 'form:name')
+    await storage.set_data(KEY, {'name': 'Test'})
+
+    assert await storage.get_state(KEY) == 'form:name'
+    assert await storage.get_data(KEY) == {'name': 'Test'}
+    await storage.close()
+
+
+async def test_state_survives_reopen(tmp_path):
+    path = str(tmp_path / 'fsm.sqlite3')
+    storage = SQLiteStorage(path, flush_interval=60)
+    await storage.set_state(KEY, 'form:name')
+    await storage.set_data(KEY, {'name': 'Test'})
+    await storage.close()
+
+    reopened = SQLiteStorage(path)
+    assert await reopened.get_state(KEY) == 'form:name'
+    assert await reopened.get_data(KEY) == {'name': 'Test'}
+    await reopened.close()
+
+
+async def test_cleared_state_is_removed(tmp_path):
+    path = str(tmp_path / 'fsm.sqlite3')
+    storage = SQLiteStorage(path, flush_interval=60)
+    await storage.set_state(KEY, 'form:name')
+    await storage.flush()
+
+    await storage.set_state(KEY, None)
+    await storage.set_data(KEY, {})
+    await storage.close()
+
+    reopened = SQLiteStorage(path)
+    assert await reopened.get_state(KEY) is None
+    assert await reopened.get_data(KEY) == {}
+    await reopened.close()
+
+
+async def test_close_waits_for_the_flush_in_progress(tmp_path):
+    path = str(tmp_path / 'fsm.sqlite3')
+    storage = SQLiteStorage(path, pool_size=1, batch_size=1)
+    # Поток пула открывает свое соединение
+    assert await storage.get_state(KEY) is None
+    write_batch = storage._write_batch
+
+    def slow_write_batch(batch):
+        time.sleep(0.2)
+        write_batch(batch)
+
+    storage._write_batch = slow_write_batch
+    await storage.set_state(KEY, 'form:name')
+    # Фоновый сброс уже пишет батч в потоке пула
+    await asyncio.sleep(0.05)
+    await storage.close()
+
+    reopened = SQLiteStorage(path)
+    assert await reopened.get_state(KEY) == 'form:name'
+    await reopened.close()
@@ -0,0 +1,54 @@
+import pytest
+from aiogram.methods import DeleteMessage, EditMessageCaption, EditMessageMedia, SendMessage
+from aiogram.types import Message
+
+from src.handlers.private.screens import ScreenName, screens
+from src.handlers.private.transitions import show_screen
+from src.utils.media_cache import media_cache
+
+
+def photo_message(bot, file_id: str, file_unique_id: str) -> Message:
+    return Message.model_validate(
+        {
+            'message_id': 10,
+            'date': 0,
+            'chat': {'id': 1000, 'type': 'private'},
+            'photo': [{'file_id': file_id, 'file_unique_id': file_unique_id, 'width': 1, 'height': 1}],
+            'caption': 'screen',
+        },
+        context={'bot': bot},
+    )
+
+
+@pytest.fixture
+def cached_start_photo(monkeypatch):
+    start_photo = screens[ScreenName.START].photo
+    monkeypatch.setattr(media_cache, '_files', {media_cache.digest(start_photo): ('file-id-1', 'unique-1')})
+
+
+async def test_same_photo_with_other_file_id_is_edited_by_caption(bot, session, cached_start_photo):
+    # Тот же файл в другом сообщении может прийти с другим file_id
+    message = photo_message(bot, 'file-id-2', 'unique-1')
+
+    await show_screen(message, screens[ScreenName.START])
+
+    assert session.methods() == [EditMessageCaption]
+
+
+async def test_other_photo_is_replaced_by_edit_media(bot, session, cached_start_photo, monkeypatch):
+    monkeypatch.setattr(media_cache, 'remember', lambda asset, message: None)
+    message = photo_message(bot, 'file-id-3', 'unique-3')
+
+    await show_screen(message, screens[ScreenName.START])
+
+    assert session.methods() == [EditMessageMedia]
+
+
+async def test_screen_with_link_previews_is_resent_as_text(bot, session):
+    message = photo_message(bot, 'file-id-1', 'unique-1')
+
+    await show_screen(message, screens[ScreenName.RETAIL])
+
+    assert sorted(session.methods(), key=lambda method: method.__name__) == [DeleteMessage, SendMessage]
+    sent = next(request for request in session.requests if isinstance(request, SendMessage))
+    assert sent.disable_web_page_preview is False
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from src.utils.ttl_cache import TTLCache
+
+
+async def test_concurrent_loads_are_coalesced():
+    cache: TTLCache[int] = TTLCache(ttl=60)
+    calls = 0
+
+    async def loader() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*(cache.get('key', loader) for _ in range(5)))
+
+    assert results == [42] * 5
+    assert calls == 1
+    assert await cache.get('key', loader) == 42
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['coalesced'] == 4
+
+
+async def test_errors_are_not_cached():
+    cache: TTLCache[int] = TTLCache(ttl=60)
+
+    async def failing() -> int:
+        raise RuntimeError('boom')
+
+    async def loader() -> int:
+        return 1
+
+    with pytest.raises(RuntimeError):
+        await cache.get('key', failing)
+    assert await cache.get('key', loader) == 1
+
+
+async def test_invalidation_during_load_discards_result():
+    cache: TTLCache[int] = TTLCache(ttl=60)
+    release = asyncio.Event()
+
+    async def stale() -> int:
+        await release.wait()
+        return 1
+
+    async def fresh() -> int:
+        return 2
+
+    pending = asyncio.create_task(cache.get('key', stale))
+    await asyncio.sleep(0)
+    cache.invalidate('key')
+    release.set()
+
+    assert await pending == 1
+    assert await cache.get('key', fresh) == 2
+
+
+async def test_expired_values_are_reloaded():
+    cache: TTLCache[int] = TTLCache(ttl=0)
+    values = iter([1, 2])
+
+    async def loader() -> int:
+        return next(values)
+
+    assert await cache.get('key', loader) == 1
+    assert await cache.get('key', loader) == 2
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from src.utils.update_queue import OverloadPolicy, QueueClosed, QueueOverloaded, UpdateQueue
+
+
+async def test_updates_of_one_key_are_processed_in_order():
+    processed = []
+
+    async def handler(payload):
+        await asyncio.sleep(0.001 * (payload % 3))
+        processed.append(payload)
+
+    queue = UpdateQueue(handler, workers=4, maxsize=100)
+    queue.start()
+    for i in range(20):
+        queue.put(i, key='chat')
+
+    report = await queue.drain(timeout=5)
+
+    assert processed == list(range(20))
+    assert report.clean
+    assert report.processed == 20
+
+
+async def test_reject_policy_raises_when_shard_is_full():
+    release = asyncio.Event()
+
+    async def handler(payload):
+        await release.wait()
+
+    queue = UpdateQueue(handler, workers=1, maxsize=1)
+    queue.start()
+    queue.put(1, key=1)
+    await asyncio.sleep(0)  # воркер забирает первое обновление
+    queue.put(2, key=1)
+
+    with pytest.raises(QueueOverloaded):
+        queue.put(3, key=1)
+
+    release.set()
+    await queue.drain(timeout=5)
+    assert queue.rejected == 1
+
+
+async def test_drop_oldest_policy_replaces_oldest_update():
+    release = asyncio.Event()
+    processed = []
+
+    async def handler(payload):
+        await release.wait()
+        processed.append(payload)
+
+    queue = UpdateQueue(handler, workers=1, maxsize=1, policy=OverloadPolicy.DROP_OLDEST)
+    queue.start()
+    queue.put(1, key=1)
+    await asyncio.sleep(0)
+    queue.put(2, key=1)
+    queue.put(3, key=1)
+
+    release.set()
+    await queue.drain(timeout=5)
+    assert processed == [1, 3]
+    assert queue.dropped == 1
+
+
+async def test_drain_cancels_stuck_updates_and_rejects_new_ones():
+    async def handler(payload):
+        await asyncio.sleep(10)
+
+    queue = UpdateQueue(handler, workers=1, maxsize=10)
+    queue.start()
+    queue.put(1, key=1)
+    queue.put(2, key=1)
+    await asyncio.sleep(0)
+
+    report = await queue.drain(timeout=0.05)
+
+    assert report.cancelled == 1
+    assert report.dropped == 1
+    assert not report.clean
+    with pytest.raises(QueueClosed):
+        queue.put(3, key=1)
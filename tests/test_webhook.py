@@ -0,0 +1,107 @@
+import pytest
+from aiogram import Dispatcher
+from aiogram.methods import GetWebhookInfo, SetWebhook
+from aiogram.types import WebhookInfo
+
+from src.on_startup.webhook import get_webhook_max_connections, setup_webhook
+
+from conf.config import settings
+
+URL = 'https://example.com/tg/webhook'
+
+
+@pytest.fixture
+def webhook_settings(monkeypatch):
+    monkeypatch.setattr(settings, 'WEBHOOK_URL', URL)
+    monkeypatch.setattr(settings, 'webhook_workers', 16)
+    monkeypatch.setattr(settings, 'webhook_max_connections', None)
+    monkeypatch.setattr(settings, 'webhook_drop_pending_updates', False)
+    return settings
+
+
+@pytest.fixture
+def message_dispatcher() -> Dispatcher:
+    dp = Dispatcher()
+
+    @dp.message()
+    async def handler(message):
+        pass
+
+    return dp
+
+
+def webhook_info(url: str = URL, allowed_updates: list[str] | None = None, max_connections: int = 16) -> WebhookInfo:
+    return WebhookInfo(
+        url=url,
+        has_custom_certificate=False,
+        pending_update_count=0,
+        allowed_updates=allowed_updates if allowed_updates is not None else ['message'],
+        max_connections=max_connections,
+    )
+
+
+@pytest.mark.parametrize(
+    'workers, max_connections, expected',
+    [
+        (16, None, 16),
+        (16, 40, 40),
+        (500, None, 100),
+        (16, 500, 100),
+        (0, None, 1),
+    ],
+)
+def test_max_connections_follow_workers_within_telegram_limits(
+    webhook_settings, monkeypatch, workers, max_connections, expected
+):
+    monkeypatch.setattr(settings, 'webhook_workers', workers)
+    monkeypatch.setattr(settings, 'webhook_max_connections', max_connections)
+
+    assert get_webhook_max_connections() == expected
+
+
+async def test_unchanged_webhook_is_not_registered_again(webhook_settings, message_dispatcher, bot, session):
+    session.results[GetWebhookInfo] = webhook_info()
+
+    await setup_webhook(bot, message_dispatcher)
+
+    assert session.methods() == [GetWebhookInfo]
+
+
+@pytest.mark.parametrize(
+    'current',
+    [
+        webhook_info(url='https://example.com/old'),
+        webhook_info(allowed_updates=['message', 'callback_query']),
+        webhook_info(max_connections=40),
+    ],
+)
+async def test_changed_webhook_is_registered(webhook_settings, message_dispatcher, bot, session, current):
+    session.results[GetWebhookInfo] = current
+
+    await setup_webhook(bot, message_dispatcher)
+
+    assert session.methods() == [GetWebhookInfo, SetWebhook]
+    request = session.requests[-1]
+    assert request.url == URL
+    assert request.allowed_updates == ['message']
+    assert request.max_connections == 16
+
+
+async def test_dropping_pending_updates_always_registers(
+    webhook_settings, message_dispatcher, bot, session, monkeypatch
+):
+    monkeypatch.setattr(settings, 'webhook_drop_pending_updates', True)
+    session.results[GetWebhookInfo] = webhook_info()
+
+    await setup_webhook(bot, message_dispatcher)
+
+    assert session.methods() == [GetWebhookInfo, SetWebhook]
+    assert session.requests[-1].drop_pending_updates is True
+
+
+async def test_webhook_is_not_set_without_url(webhook_settings, message_dispatcher, bot, session, monkeypatch):
+    monkeypatch.setattr(settings, 'WEBHOOK_URL', '')
+
+    await setup_webhook(bot, message_dispatcher)
+
+    assert session.requests == []